@@ -1,13 +1,24 @@
 # app.py
 
 import os
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, send_from_directory
+import re
+import atexit
+import threading
+from contextlib import nullcontext
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, send_from_directory, Response
 from datetime import datetime
-from urllib.parse import urlparse
-from src.website_analyzer import WebsiteAnalyzer
 from src.ai_analyzer import AIAnalyzer
-from src.template_generator import TemplateGenerator
+from src.template_generator import TemplateGenerator, TEMPLATES
 from src.history_manager import HistoryManager
+from src.browser_pool import get_browser_pool, WARM_UP_ON_START
+from src.analysis_pipeline import run_analysis, AnalysisError, STAGES as ANALYSIS_STAGES
+from src.analysis_cache import AnalysisCache
+from src.job_queue import LocalJobQueue, QueueFullError
+from src.website_analyzer import normalize_url, domain_of
+from src.thumbnails import make_thumbnail
+from src.metrics import render_prometheus, start_trace
+from src.storage_manager import StorageManager, resolve_artifact
+from werkzeug.utils import safe_join
 
 app = Flask(__name__)
 app.secret_key = 'this-is-the-master-secret-key'
@@ -17,8 +28,28 @@ OUTPUT_DIR = os.path.join(os.getcwd(), 'output')
 os.makedirs(ASSETS_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-history_manager = HistoryManager()
-ai_analyzer = AIAnalyzer()
+history_manager = analysis_cache = ai_analyzer = browser_pool = job_queue = storage_manager = None
+
+def create_services():
+    """Creates the history, caches, AI analyzer, browser pool, job queue and storage manager the routes use."""
+    global history_manager, analysis_cache, ai_analyzer, browser_pool, job_queue, storage_manager
+    history_manager = HistoryManager()
+    analysis_cache = AnalysisCache()
+    ai_analyzer = AIAnalyzer(cache=analysis_cache)
+    browser_pool = get_browser_pool()
+    atexit.register(browser_pool.shutdown)
+    if WARM_UP_ON_START:
+        # Start Chrome in the background so the first requests skip its cold start without delaying startup.
+        threading.Thread(target=browser_pool.warm_up, daemon=True, name="browser-warm-up").start()
+    job_queue = LocalJobQueue()
+    storage_manager = StorageManager([ASSETS_DIR, OUTPUT_DIR], history_manager=history_manager)
+    storage_manager.start()
+
+# Render pool workers are spawned and, when the app is started with `python app.py`, import this
+# module again as `__mp_main__`. They only render, so the services (and their threads) exist in the
+# server process only.
+if __name__ != '__mp_main__':
+    create_services()
 
 @app.template_filter('format_datetime')
 def format_datetime_filter(iso_string):
@@ -33,15 +64,52 @@ def format_datetime_filter(iso_string):
 def index():
     return render_template('index.html')
 
+@app.template_filter('thumbnail')
+def thumbnail_filter(image_path):
+    """Jinja2 filter that returns the URL path of an image's small thumbnail, creating it if needed."""
+    thumb_path = make_thumbnail(image_path)
+    return thumb_path.replace(os.path.sep, '/') if thumb_path else ''
+
+HISTORY_PAGE_SIZE = 20
+
+def _history_filters():
+    return {
+        "domain": request.args.get('domain', '').strip() or None,
+        "date_from": request.args.get('from', '').strip() or None,
+        "date_to": request.args.get('to', '').strip() or None,
+    }
+
 @app.route('/history')
 def history_page():
-    history_data = history_manager.get_history()
-    return render_template('history.html', history=history_data)
+    filters = _history_filters()
+    history_data, next_cursor = history_manager.get_page(limit=HISTORY_PAGE_SIZE, **filters)
+    return render_template('history.html', history=history_data, next_cursor=next_cursor, filters=filters)
+
+@app.route('/api/history')
+def history_api():
+    """JSON pages of history for infinite scrolling. Accepts the same filters as /history plus `cursor`."""
+    try:
+        limit = max(1, min(int(request.args.get('limit', HISTORY_PAGE_SIZE)), 100))
+        history_data, next_cursor = history_manager.get_page(
+            limit=limit, cursor=request.args.get('cursor') or None, **_history_filters())
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or limit."}), 400
+    items = [{
+        "id": item["id"],
+        "domain": item.get("domain"),
+        "timestamp": item["timestamp"],
+        "display_timestamp": format_datetime_filter(item["timestamp"]),
+        "logo_path": item.get("base_analysis", {}).get("logo_path"),
+        "thumbnail_path": thumbnail_filter(item.get("base_analysis", {}).get("screenshot_path")),
+        "ai_description": item.get("base_analysis", {}).get("ai_description"),
+        "colors": item.get("base_analysis", {}).get("colors", []),
+        "report_url": url_for('report_page', history_id=item["id"]),
+    } for item in history_data]
+    return jsonify({"items": items, "next_cursor": next_cursor})
 
 @app.route('/report/<int:history_id>')
 def report_page(history_id):
-    history_data = history_manager.get_history()
-    report_item = next((item for item in history_data if item.get('id') == history_id), None)
+    report_item = history_manager.get_analysis(history_id)
     if not report_item:
         return redirect(url_for('history_page'))
     return render_template('report.html', report=report_item)
@@ -58,62 +126,49 @@ def generate():
     data = request.get_json()
     url = data.get('url')
     if not url: return jsonify({"error": "URL is required."}), 400
+    force_refresh = bool(data.get('force_refresh', False))
+    include_trace = bool(data.get('trace', False))
     
-    print(f"\n--- Starting Analysis for: {url} ---")
-    
+    generator_url = url_for('mockup_generator')
+
+    def analysis_job(job):
+        print(f"\n--- Starting Analysis for: {url} ---")
+        # Other jobs may analyze pages of the same site; its screenshot is only compressed once none are running.
+        with storage_manager.in_use(domain_of(url)), (start_trace() if include_trace else nullcontext()) as trace:
+            try:
+                analysis, timings = run_analysis(url, ai_analyzer, browser_pool=browser_pool, on_progress=job.update_step,
+                                                 cache=analysis_cache, force_refresh=force_refresh)
+            except AnalysisError as e:
+                print(f"Analysis failed for {url}: {e}")
+                raise
+            except Exception as e:
+                print(f"CRITICAL ERROR in analysis job: {e}")
+                raise RuntimeError(f"A critical server error occurred: {e}")
+            print(f"--- Analysis Complete in {timings['total']}s. Preparing response. ---")
+            final_response = {**analysis, "generator_url": generator_url}
+            history_manager.save_analysis(final_response)
+            make_thumbnail(analysis["base_analysis"]["screenshot_path"])
+        storage_manager.schedule_compression(analysis["base_analysis"]["screenshot_path"])
+        result = {**final_response, "timings": timings}
+        if include_trace:
+            result["trace"] = trace
+        return result
+
     try:
-        analyzer = WebsiteAnalyzer(url)
-        
-        print("Step 1: Fetching and parsing HTML...")
-        if not analyzer.fetch_and_parse_html():
-            return jsonify({"error": "Analysis failed: Could not fetch or parse the website's HTML."}), 500
-        
-        print("Step 2: Capturing screenshot...")
-        screenshot_path = analyzer.capture_screenshot()
-        if not screenshot_path:
-            return jsonify({"error": "Analysis failed: Could not capture a screenshot. The site may be blocking automation."}), 500
-        
-        print("Step 3: Finding logo...")
-        logo_path = analyzer.get_logo()
-        if not logo_path:
-            print("WARNING: No suitable logo found. Proceeding without a logo.")
-        
-        print("Step 4: Extracting colors...")
-        source_image_for_colors = logo_path if logo_path else screenshot_path
-        colors = analyzer.get_brand_colors(source_image_for_colors, 6)
-        if not colors or len(colors) < 2:
-            print("WARNING: Could not extract a full color palette. Using fallback colors.")
-            colors = ['#7A5CFA', '#1A2238', '#FFFFFF', '#9DA3B0', '#3C4A5A']
-        
-        print("Step 5: Performing AI analysis...")
-        ai_analysis = ai_analyzer.get_structured_analysis(screenshot_path, colors)
-        # FINAL CHECK: Ensure the AI analysis returned a valid dictionary
-        if not ai_analysis or "brand_aesthetics" not in ai_analysis:
-             return jsonify({"error": "Analysis failed: The AI model could not return a valid analysis of the screenshot."}), 500
-
-        print("--- Analysis Complete. Preparing response. ---")
-        domain = urlparse(url if url.startswith('http') else 'https://' + url).netloc
-        
-        final_response = {
-            "domain": domain,
-            "base_analysis": {
-                "screenshot_path": screenshot_path.replace(os.path.sep, '/'),
-                "logo_path": logo_path.replace(os.path.sep, '/') if logo_path else None,
-                "colors": colors,
-                "ai_description": ai_analysis.get("brand_aesthetics", "AI analysis could not determine aesthetics."),
-                "ai_recommendations": ai_analysis.get("design_recommendations", [])
-            },
-            "generator_url": url_for('mockup_generator')
-        }
-        
-        session['latest_analysis_data'] = final_response
-        history_manager.save_analysis(final_response)
-        
-        return jsonify(final_response)
-        
-    except Exception as e:
-        print(f"CRITICAL ERROR in /generate route: {e}")
-        return jsonify({"error": f"A critical server error occurred: {e}"}), 500
+        # Only identical submissions share a job: a refresh must not get a cached run, nor a traced one an untraced run.
+        job = job_queue.submit((normalize_url(url), force_refresh, include_trace), analysis_job, steps=ANALYSIS_STAGES)
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "10"}
+    return jsonify({"job_id": job.id, "status_url": url_for('job_status', job_id=job.id)}), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found."}), 404
+    if job.status == "done":
+        session['latest_analysis_data'] = {k: v for k, v in job.result.items() if k not in ("timings", "trace")}
+    return jsonify(job.to_dict())
 
 @app.route('/regenerate', methods=['POST'])
 def regenerate():
@@ -129,26 +184,88 @@ def regenerate():
         generator = TemplateGenerator(domain_output_dir, domain)
         result = None
         accent_color = data.get('accent_color', '#333333')
-        if active_template == 'mug':
-            result = generator.create_mug_template(base_logo_path, new_color)
-        elif active_template == 'card':
-            result = generator.create_business_card_template(base_logo_path, new_color, accent_color, user_name=custom_text.get('name'), user_title=custom_text.get('title'))
-        elif active_template == 'tshirt':
-            result = generator.create_tshirt_template(base_logo_path, new_color, slogan_text=custom_text.get('slogan'))
+        with (start_trace() if data.get('trace') else nullcontext()) as trace:
+            if active_template == 'mug':
+                result = generator.create_mug_template(base_logo_path, new_color)
+            elif active_template == 'card':
+                result = generator.create_business_card_template(base_logo_path, new_color, accent_color, user_name=custom_text.get('name'), user_title=custom_text.get('title'))
+            elif active_template == 'tshirt':
+                result = generator.create_tshirt_template(base_logo_path, new_color, slogan_text=custom_text.get('slogan'))
         if result and result.get("design_path"):
-            return jsonify({"success": True, "data": result})
+            response = {"success": True, "data": _web_paths(result)}
+            if trace is not None:
+                response["trace"] = trace
+            return jsonify(response)
         else:
             return jsonify({"error": f"Backend failed to generate template for {active_template}."}), 500
     except Exception as e:
         print(f"CRITICAL ERROR during regeneration: {e}")
         return jsonify({"error": "Failed to regenerate templates due to a server exception."}), 500
 
+HEX_COLOR = re.compile(r'#[0-9a-fA-F]{6}')
+# Palettes have at most 6 colors; anything much longer is not from the mockup UI.
+MAX_BATCH_COLORS = 8
+
+@app.route('/regenerate_batch', methods=['POST'])
+def regenerate_batch():
+    """Renders several templates in several colors in one call so the mockup UI can switch between them instantly."""
+    data = request.get_json()
+    logo_path, domain, colors = data.get('logo_path'), data.get('domain'), data.get('colors')
+    templates = data.get('templates') or list(TEMPLATES)
+    custom_text = data.get('custom_text', {})
+    if (not all([domain, colors]) or not isinstance(colors, list) or not isinstance(templates, list)
+            or any(template not in TEMPLATES for template in templates)
+            or not all(isinstance(color, str) and HEX_COLOR.fullmatch(color) for color in colors)):
+        return jsonify({"error": "Missing or invalid data for batch regeneration."}), 400
+    # Every template is rendered in every color, so both lists are deduplicated and bounded.
+    colors, templates = list(dict.fromkeys(colors)), list(dict.fromkeys(templates))
+    if len(colors) > MAX_BATCH_COLORS:
+        return jsonify({"error": f"At most {MAX_BATCH_COLORS} colors can be rendered in one batch."}), 400
+    try:
+        base_logo_path = os.path.join(os.getcwd(), logo_path) if logo_path else None
+        generator = TemplateGenerator(os.path.join(OUTPUT_DIR, domain), domain)
+        results = generator.render_batch(
+            base_logo_path, colors, templates, accent_color=data.get('accent_color', '#333333'),
+            user_name=custom_text.get('name'), user_title=custom_text.get('title'), slogan_text=custom_text.get('slogan'))
+        return jsonify({"success": True, "data": {
+            template: {color: _web_paths(result) if result else None for color, result in by_color.items()}
+            for template, by_color in results.items()
+        }})
+    except Exception as e:
+        print(f"CRITICAL ERROR during batch regeneration: {e}")
+        return jsonify({"error": "Failed to regenerate templates due to a server exception."}), 500
+
+def _web_paths(result):
+    """Turns the file system paths of a render result into URL paths the browser can load."""
+    return {key: '/' + os.path.relpath(path, os.getcwd()).replace(os.path.sep, '/') if path else None
+            for key, path in result.items()}
+
+@app.route('/metrics')
+def metrics():
+    """Stage latencies, cache results and fallback counts in Prometheus text format."""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/assets/<path:path>')
 def serve_asset(path):
+    # Screenshots are stored as WebP once their analysis is done; links to the PNG keep working.
+    resolved = resolve_artifact(safe_join(ASSETS_DIR, path))
+    if resolved:
+        storage_manager.touch(resolved)
+        path = os.path.relpath(resolved, ASSETS_DIR)
     return send_from_directory(ASSETS_DIR, path)
 
+# Rendered designs are named by content hash, so a given URL always serves the same bytes.
+CONTENT_HASHED_FILE = re.compile(r'.*_[0-9a-f]{16}\.(png|pdf)$')
+
 @app.route('/output/<path:path>')
 def serve_output(path):
+    full_path = safe_join(OUTPUT_DIR, path)
+    if full_path:
+        storage_manager.touch(full_path)
+    if CONTENT_HASHED_FILE.match(path):
+        response = send_from_directory(OUTPUT_DIR, path, max_age=365 * 24 * 60 * 60)
+        response.cache_control.immutable = True
+        return response
     return send_from_directory(OUTPUT_DIR, path)
 
 if __name__ == '__main__':
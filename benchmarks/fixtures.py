@@ -0,0 +1,143 @@
+# benchmarks/fixtures.py
+"""
+Offline stand-ins for the network, Chrome and Gemini, built from the assets/ corpus.
+Each corpus domain becomes a small static site on its own local port.
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from urllib.parse import urlparse
+
+SITE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <title>{domain}</title>
+    {icon_link}
+</head>
+<body>
+    <header>
+        <a href="/">{logo_img}</a>
+        <nav><a href="/about">About</a><a href="/contact">Contact</a></nav>
+    </header>
+    <main>{filler}</main>
+</body>
+</html>
+"""
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class FixtureSite:
+    """A static copy of one corpus domain served over HTTP on a local port."""
+    def __init__(self, domain, source_dir, root_dir):
+        self.domain = domain
+        self.root = os.path.join(root_dir, domain)
+        os.makedirs(self.root, exist_ok=True)
+        self.screenshot_path = os.path.join(source_dir, "screenshot.png")
+        logos = sorted(name for name in os.listdir(source_dir) if name.startswith(("logo", "favicon_logo")))
+        logo_img, icon_link = "", ""
+        if logos:
+            logo = logos[0]
+            shutil.copyfile(os.path.join(source_dir, logo), os.path.join(self.root, logo))
+            if logo.startswith("favicon_logo"):
+                icon_link = f'<link rel="apple-touch-icon" href="/{logo}">'
+            else:
+                logo_img = f'<img src="/{logo}" class="site-logo" alt="{domain} logo">'
+        # Pad the page so HTML parsing does a realistic amount of work.
+        filler = "".join(f"<section><h2>Section {i}</h2><p>{'Lorem ipsum dolor sit amet. ' * 20}</p></section>" for i in range(50))
+        with open(os.path.join(self.root, "index.html"), "w") as f:
+            f.write(SITE_TEMPLATE.format(domain=domain, icon_link=icon_link, logo_img=logo_img, filler=filler))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=self.root))
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class FixtureSites:
+    """Serves every domain in the corpus that has a screenshot. Use as a context manager."""
+    def __init__(self, assets_dir):
+        self.assets_dir = assets_dir
+        self.sites = []
+        self._root = None
+
+    def __enter__(self):
+        self._root = tempfile.mkdtemp(prefix="merch-fixtures-")
+        for domain in sorted(os.listdir(self.assets_dir)):
+            source_dir = os.path.join(self.assets_dir, domain)
+            if os.path.exists(os.path.join(source_dir, "screenshot.png")):
+                self.sites.append(FixtureSite(domain, source_dir, self._root))
+        return self
+
+    def screenshot_for(self, url):
+        netloc = urlparse(url).netloc
+        return next(site.screenshot_path for site in self.sites if urlparse(site.url).netloc == netloc)
+
+    def __exit__(self, *exc):
+        for site in self.sites:
+            site.close()
+        shutil.rmtree(self._root, ignore_errors=True)
+
+class StubDriver:
+    """Mimics the parts of a Selenium WebDriver used by BrowserPool and WebsiteAnalyzer."""
+    def __init__(self, sites, page_load_seconds):
+        self.sites = sites
+        self.page_load_seconds = page_load_seconds
+        self.current_url = None
+        self.window_handles = ["main"]
+
+    def get(self, url):
+        if url != "about:blank":
+            time.sleep(self.page_load_seconds)
+        self.current_url = url
+
+    def save_screenshot(self, path):
+        shutil.copyfile(self.sites.screenshot_for(self.current_url), path)
+        return True
+
+    def delete_all_cookies(self):
+        pass
+
+    def execute_script(self, script):
+        pass
+
+    def quit(self):
+        self.window_handles = []
+
+def stub_driver_factory(sites, page_load_seconds=0.5, startup_seconds=1.0):
+    """Returns a BrowserPool driver factory whose drivers cost `startup_seconds` to start."""
+    def factory():
+        time.sleep(startup_seconds)
+        return StubDriver(sites, page_load_seconds)
+    return factory
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubVisionModel:
+    """
+    Stands in for the Gemini vision model, answering with fixed JSON after a delay.
+    Multi-image (batched) prompts get a JSON array with one analysis per image.
+    """
+    def __init__(self, latency_seconds=1.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def generate_content(self, prompt_parts):
+        self.calls += 1
+        time.sleep(self.latency_seconds)
+        analysis = {
+            "brand_aesthetics": "A clean, modern layout with generous whitespace and a restrained palette.",
+            "design_recommendations": ["Lead with the logo.", "Use the primary color sparingly.", "Keep typography simple."],
+        }
+        images = sum(1 for part in prompt_parts if not isinstance(part, str))
+        return _StubResponse("```json\n" + json.dumps(analysis if images == 1 else [analysis] * images) + "\n```")
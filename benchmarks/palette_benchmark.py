@@ -0,0 +1,65 @@
+# benchmarks/palette_benchmark.py
+"""
+Compares the NumPy palette engine with colorgram on the images in assets/.
+
+    python benchmarks/palette_benchmark.py [--repeat 3] [--colors 6]
+
+colorgram is optional; install `colorgram.py` to include it in the comparison.
+Prints one JSON object per image and a summary line.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.palette import extract_palette
+
+try:
+    import colorgram
+except ImportError:
+    colorgram = None
+
+def _time(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def _colorgram_palette(path, num_colors):
+    return [(f'#{c.rgb.r:02x}{c.rgb.g:02x}{c.rgb.b:02x}', c.proportion) for c in colorgram.extract(path, num_colors)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', default='assets')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--colors', type=int, default=6)
+    args = parser.parse_args()
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.assets, '*', '*'))
+                   if p.lower().endswith(('.png', '.jpg', '.jpeg')) and '_thumb' not in p)
+    totals = {"numpy": 0.0, "colorgram": 0.0}
+    for path in paths:
+        row = {"image": path}
+        row["numpy_seconds"], row["numpy_palette"] = _time(lambda: extract_palette(path, args.colors), args.repeat)
+        totals["numpy"] += row["numpy_seconds"]
+        if colorgram:
+            row["colorgram_seconds"], row["colorgram_palette"] = _time(lambda: _colorgram_palette(path, args.colors), args.repeat)
+            totals["colorgram"] += row["colorgram_seconds"]
+            row["speedup"] = round(row["colorgram_seconds"] / row["numpy_seconds"], 1)
+        print(json.dumps(row))
+
+    summary = {"images": len(paths), "numpy_total_seconds": round(totals["numpy"], 4)}
+    if colorgram:
+        summary["colorgram_total_seconds"] = round(totals["colorgram"], 4)
+        summary["speedup"] = round(totals["colorgram"] / totals["numpy"], 1) if totals["numpy"] else None
+    print(json.dumps({"summary": summary}))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/pdf_benchmark.py
+"""
+Compares the vector PDF output of TemplateGenerator with the previous approach
+of embedding the rendered PNG preview in the PDF, over the logos in assets/.
+
+    python benchmarks/pdf_benchmark.py [--repeat 3]
+
+Prints one JSON object per template and a summary line with time and size totals.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reportlab.pdfgen import canvas as pdfcanvas
+from reportlab.lib.utils import ImageReader
+from src.template_generator import TemplateGenerator, TEMPLATES
+
+COLORS = ['#7A5CFA', '#1A2238', '#E4572E']
+
+def raster_pdf(canvas):
+    """The previous PDF output: the preview image embedded in a page of the same size in points."""
+    buffer = io.BytesIO()
+    c = pdfcanvas.Canvas(buffer, pagesize=canvas.size, invariant=1)
+    c.drawImage(ImageReader(canvas), 0, 0, width=canvas.width, height=canvas.height)
+    c.save()
+    return buffer.getvalue()
+
+def _layout(generator, template, color):
+    if template == 'mug':
+        return generator._layout_mug(color)
+    if template == 'card':
+        return generator._layout_business_card(color, "#333333", "Jane Doe", "Head of Design")
+    return generator._layout_tshirt(color, "Made with care")
+
+def _best(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', default='assets')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    logos = sorted(os.path.join(args.assets, domain, name) for domain in os.listdir(args.assets)
+                   if os.path.isdir(os.path.join(args.assets, domain))
+                   for name in os.listdir(os.path.join(args.assets, domain)) if name.startswith(("logo", "favicon_logo")))
+    generator = TemplateGenerator(tempfile.mkdtemp(prefix="merch-pdf-bench-"), "example.com")
+    totals = {"raster_seconds": 0.0, "vector_seconds": 0.0, "raster_bytes": 0, "vector_bytes": 0}
+    for template in TEMPLATES:
+        row = {"template": template, "raster_seconds": 0.0, "vector_seconds": 0.0, "raster_bytes": 0, "vector_bytes": 0}
+        for logo_path in logos:
+            logo_img = generator._prepare_logo(logo_path)
+            for color in COLORS:
+                design = _layout(generator, template, color)
+                canvas = generator._rasterize(design, logo_img)
+                seconds, data = _best(lambda: raster_pdf(canvas), args.repeat)
+                row["raster_seconds"] += seconds
+                row["raster_bytes"] += len(data)
+                seconds, data = _best(lambda: generator._encode_pdf(design, logo_img), args.repeat)
+                row["vector_seconds"] += seconds
+                row["vector_bytes"] += len(data)
+        for key in totals:
+            totals[key] += row[key]
+            row[key] = round(row[key], 4)
+        row["renders"] = len(logos) * len(COLORS)
+        print(json.dumps(row))
+
+    summary = {key: round(value, 4) for key, value in totals.items()}
+    summary["speedup"] = round(totals["raster_seconds"] / totals["vector_seconds"], 1) if totals["vector_seconds"] else None
+    summary["size_ratio"] = round(totals["vector_bytes"] / totals["raster_bytes"], 3) if totals["raster_bytes"] else None
+    print(json.dumps({"summary": summary}))
+
+if __name__ == '__main__':
+    main()
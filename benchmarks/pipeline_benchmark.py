@@ -0,0 +1,254 @@
+# benchmarks/pipeline_benchmark.py
+"""
+Benchmarks the analyze-and-render pipeline offline, so runs are reproducible.
+
+    python benchmarks/pipeline_benchmark.py [--repeat 3] [--output results.json]
+    python benchmarks/pipeline_benchmark.py --sweep 1,2,4,8 [--requests 16]
+
+Every domain in assets/ with a screenshot is served as a fixture site from a
+local HTTP server. Chrome and Gemini are replaced by stubs with fixed
+latencies (--page-load, --driver-startup, --ai-latency), and all files are
+written to a temporary working directory, so the repo is left untouched.
+
+The default mode runs WebsiteAnalyzer through the analysis pipeline for each
+site, then renders every template over the corpus logos. --sweep instead
+drives /generate and /regenerate through the Flask app at each worker count.
+Results are printed as one JSON object (and written to --output if given).
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import tempfile
+import argparse
+import threading
+from collections import defaultdict
+from contextlib import redirect_stdout
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+from benchmarks.fixtures import FixtureSites, StubVisionModel, stub_driver_factory
+from src.metrics import percentile
+
+RENDER_COLORS = ['#7A5CFA', '#1A2238', '#E4572E']
+
+def latency_summary(latencies, wall_seconds):
+    return {
+        "count": len(latencies),
+        "wall_seconds": round(wall_seconds, 4),
+        "throughput_per_second": round(len(latencies) / wall_seconds, 3) if wall_seconds else None,
+        "p50_seconds": percentile(latencies, 50),
+        "p95_seconds": percentile(latencies, 95),
+        "max_seconds": round(max(latencies), 4) if latencies else None,
+    }
+
+def stage_breakdown(spans):
+    """Groups trace spans by stage into count, total, p50 and p95 seconds."""
+    by_stage = defaultdict(list)
+    failures = defaultdict(int)
+    for span in spans:
+        by_stage[span["stage"]].append(span["seconds"])
+        failures[span["stage"]] += span["failed"]
+    return {stage: {
+        "count": len(seconds),
+        "total_seconds": round(sum(seconds), 4),
+        "p50_seconds": percentile(seconds, 50),
+        "p95_seconds": percentile(seconds, 95),
+        "failures": failures[stage],
+    } for stage, seconds in sorted(by_stage.items())}
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its (waited for) children, in MB."""
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1),
+    }
+
+def corpus_logos(assets_dir):
+    return sorted(os.path.join(assets_dir, domain, name)
+                  for domain in os.listdir(assets_dir) if os.path.isdir(os.path.join(assets_dir, domain))
+                  for name in os.listdir(os.path.join(assets_dir, domain))
+                  if name.startswith(("logo", "favicon_logo")))
+
+def run_pipeline_mode(args, sites, stubs):
+    from src.analysis_pipeline import run_analysis
+    from src.ai_analyzer import AIAnalyzer
+    from src.browser_pool import BrowserPool
+    from src.template_generator import TemplateGenerator, TEMPLATES
+    from src.metrics import start_trace
+
+    ai_analyzer = AIAnalyzer(vision_model=stubs["vision_model"])
+    pool = BrowserPool(size=args.browsers, driver_factory=stubs["driver_factory"])
+    pool.warm_up()
+
+    spans, latencies, failures = [], [], 0
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for site in sites.sites:
+            run_start = time.perf_counter()
+            with start_trace() as trace:
+                try:
+                    run_analysis(site.url, ai_analyzer, browser_pool=pool)
+                except Exception as e:
+                    print(f"Analysis of {site.domain} failed: {e}", file=sys.stderr)
+                    failures += 1
+            latencies.append(time.perf_counter() - run_start)
+            spans.extend(trace)
+    analysis = {**latency_summary(latencies, time.perf_counter() - start), "failures": failures,
+                "stages": stage_breakdown(spans)}
+    pool.shutdown()
+
+    logos = corpus_logos(args.assets)
+    spans, latencies = [], []
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for logo_path in logos:
+            generator = TemplateGenerator(os.path.join("output", "benchmark"), "benchmark.local")
+            for template in TEMPLATES:
+                for color in RENDER_COLORS:
+                    run_start = time.perf_counter()
+                    with start_trace() as trace:
+                        generator.render_variant(template, generator._prepare_logo(logo_path), color, in_memory=True)
+                    latencies.append(time.perf_counter() - run_start)
+                    spans.extend(trace)
+    render = {**latency_summary(latencies, time.perf_counter() - start), "logos": len(logos),
+              "stages": stage_breakdown(spans)}
+    return {"analysis": analysis, "render": render}
+
+def _generate_and_wait(client, url):
+    """Submits one /generate request and polls its job until it finishes. Returns (job_id, status)."""
+    response = client.post('/generate', json={"url": url, "trace": True})
+    if response.status_code != 202:
+        return None, f"http_{response.status_code}"
+    job = response.get_json()
+    while True:
+        status = client.get(job["status_url"]).get_json()
+        if status["status"] in ("done", "failed"):
+            return job["job_id"], status
+        time.sleep(0.02)
+
+def _run_threads(count, target):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def run_sweep_mode(args, sites, stubs, worker_counts):
+    # The app's own browser pool is replaced by stubs below, so it must not start real Chrome.
+    os.environ["BROWSER_WARM_UP"] = "0"
+    import app as webapp
+    from src.ai_analyzer import AIAnalyzer
+    from src.browser_pool import BrowserPool
+    from src.job_queue import LocalJobQueue
+
+    webapp.ai_analyzer = AIAnalyzer(vision_model=stubs["vision_model"])
+    # Measure the uncached path; repeated URLs would otherwise be served from the analysis cache.
+    webapp.analysis_cache = None
+    logos = corpus_logos(args.assets)
+    results = []
+    for workers in worker_counts:
+        webapp.job_queue = LocalJobQueue(workers=workers, max_queued=args.requests)
+        webapp.browser_pool = BrowserPool(size=workers, driver_factory=stubs["driver_factory"])
+        webapp.browser_pool.warm_up()
+
+        # Distinct query strings keep the queue from merging requests for the same site.
+        urls = [f"{sites.sites[i % len(sites.sites)].url}/?run={i}" for i in range(args.requests)]
+        outcomes = [None] * args.requests
+
+        def generate_worker(i):
+            outcomes[i] = _generate_and_wait(webapp.app.test_client(), urls[i])
+        wall = _run_threads(args.requests, generate_worker)
+        latencies, spans, failed = [], [], 0
+        for job_id, status in outcomes:
+            job = webapp.job_queue.get(job_id) if job_id else None
+            if not job or job.status != "done":
+                failed += 1
+                continue
+            latencies.append(job.finished_at - job.created_at)
+            spans.extend(job.result.get("trace", []))
+        generate = {**latency_summary(latencies, wall), "failed": failed, "stages": stage_breakdown(spans)}
+        webapp.browser_pool.shutdown()
+
+        regen_latencies, regen_spans, regen_failed = [], [], 0
+        lock = threading.Lock()
+
+        def regenerate_worker(i):
+            nonlocal regen_failed
+            client = webapp.app.test_client()
+            logo_path = os.path.relpath(logos[i % len(logos)], os.getcwd()) if logos else None
+            for template in ('mug', 'card', 'tshirt'):
+                run_start = time.perf_counter()
+                response = client.post('/regenerate', json={
+                    "logo_path": logo_path, "domain": "benchmark.local", "new_color": RENDER_COLORS[i % len(RENDER_COLORS)],
+                    "active_template": template, "custom_text": {"name": f"Worker {i}", "slogan": f"Run {i}"}, "trace": True})
+                elapsed = time.perf_counter() - run_start
+                with lock:
+                    if response.status_code == 200:
+                        regen_latencies.append(elapsed)
+                        regen_spans.extend(response.get_json().get("trace", []))
+                    else:
+                        regen_failed += 1
+        wall = _run_threads(workers, regenerate_worker)
+        regenerate = {**latency_summary(regen_latencies, wall), "failed": regen_failed,
+                      "stages": stage_breakdown(regen_spans)}
+
+        results.append({"workers": workers, "generate": generate, "regenerate": regenerate})
+        print(f"workers={workers}: generate {generate['throughput_per_second']}/s, "
+              f"regenerate {regenerate['throughput_per_second']}/s", file=sys.stderr)
+    return {"sweep": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', default=os.path.join(REPO_DIR, 'assets'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--browsers', type=int, default=2, help="Browser pool size in the default mode.")
+    parser.add_argument('--sweep', help="Comma separated worker counts, e.g. 1,2,4,8.")
+    parser.add_argument('--requests', type=int, default=16, help="/generate requests per sweep step.")
+    parser.add_argument('--page-load', type=float, default=0.5, help="Seconds a stub page load takes.")
+    parser.add_argument('--driver-startup', type=float, default=1.0, help="Seconds a stub browser takes to start.")
+    parser.add_argument('--ai-latency', type=float, default=1.0, help="Seconds a stub AI call takes.")
+    parser.add_argument('--output', help="Also write the JSON results to this file.")
+    parser.add_argument('--keep-workdir', action='store_true', help="Keep the temporary working directory.")
+    args = parser.parse_args()
+    args.assets = os.path.abspath(args.assets)
+    output = os.path.abspath(args.output) if args.output else None
+
+    workdir = tempfile.mkdtemp(prefix="merch-bench-")
+    os.chdir(workdir)
+    try:
+        # The app logs progress with print(); keep stdout for the JSON report.
+        with redirect_stdout(sys.stderr), FixtureSites(args.assets) as sites:
+            stubs = {
+                "driver_factory": stub_driver_factory(sites, args.page_load, args.driver_startup),
+                "vision_model": StubVisionModel(args.ai_latency),
+            }
+            if args.sweep:
+                report = run_sweep_mode(args, sites, stubs, [int(n) for n in args.sweep.split(',')])
+            else:
+                report = run_pipeline_mode(args, sites, stubs)
+        report["config"] = {key: value for key, value in vars(args).items() if key not in ("output", "keep_workdir")}
+        report["config"]["sites"] = len(sites.sites)
+        report["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        os.chdir(REPO_DIR)
+        if args.keep_workdir:
+            print(f"Working directory kept at {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + "\n")
+
+if __name__ == '__main__':
+    main()
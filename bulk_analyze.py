@@ -0,0 +1,83 @@
+# bulk_analyze.py
+"""
+Analyzes a list of websites and renders their merchandise designs without the web UI.
+
+    python bulk_analyze.py urls.txt [--workers 4] [--browsers 4] [--report report.json]
+
+The input is a text file with one URL per line or a CSV file with a `url`
+column. Results are saved to the history database in batches. Finished URLs
+are logged to a checkpoint file (default `<input>.checkpoint.jsonl`), so
+running the same command again after a crash picks up where it stopped.
+A JSON summary of timings and failures is printed at the end.
+"""
+
+import sys
+import json
+import argparse
+from contextlib import redirect_stdout
+from src.ai_analyzer import AIAnalyzer
+from src.analysis_cache import AnalysisCache
+from src.browser_pool import BrowserPool
+from src.bulk_runner import BulkRunner, Checkpoint, read_urls
+from src.history_manager import HistoryManager
+from src.storage_manager import StorageManager
+from src.template_generator import TEMPLATES
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="Text file with one URL per line, or a CSV file with a `url` column.")
+    parser.add_argument('--workers', type=int, default=4, help="Sites analyzed at the same time.")
+    parser.add_argument('--browsers', type=int, default=None, help="Chrome instances shared by the workers (default: --workers).")
+    parser.add_argument('--templates', default=','.join(TEMPLATES), help="Comma separated templates to render.")
+    parser.add_argument('--colors', type=int, default=1, help="Render each template in this many of the site's top colors.")
+    parser.add_argument('--flush-every', type=int, default=20, help="Save to history after this many finished sites.")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <input>.checkpoint.jsonl).")
+    parser.add_argument('--retry-failed', action='store_true', help="Retry URLs that failed in an earlier run.")
+    parser.add_argument('--force-refresh', action='store_true', help="Ignore cached analyses.")
+    parser.add_argument('--report', help="Also write the summary to this file.")
+    args = parser.parse_args()
+
+    templates = tuple(template.strip() for template in args.templates.split(',') if template.strip())
+    unknown = [template for template in templates if template not in TEMPLATES]
+    if unknown:
+        parser.error(f"Unknown templates: {', '.join(unknown)}")
+    urls = read_urls(args.input)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.input}.checkpoint.jsonl")
+
+    cache = AnalysisCache()
+    history_manager = HistoryManager()
+    browser_pool = BrowserPool(size=args.browsers or args.workers)
+    storage_manager = StorageManager(['assets', 'output'], history_manager=history_manager)
+    storage_manager.start()
+    runner = BulkRunner(AIAnalyzer(cache=cache), history_manager, browser_pool, cache=cache,
+                        workers=args.workers, templates=templates, num_colors=args.colors,
+                        flush_every=args.flush_every, force_refresh=args.force_refresh,
+                        generator_url='/mockup-generator', storage_manager=storage_manager)
+    total = len(runner.pending_urls(urls, checkpoint, args.retry_failed))
+    finished = [0]
+
+    def on_result(entry):
+        finished[0] += 1
+        detail = f"in {entry['seconds']}s" if entry["status"] == "done" else entry["error"]
+        print(f"[{finished[0]}/{total}] {entry['url']}: {entry['status']} {detail}")
+
+    print(f"Analyzing {total} of {len(urls)} URLs; the rest are already in {checkpoint.path}.", file=sys.stderr)
+    try:
+        # Progress and pipeline logs go to stderr so stdout only carries the JSON summary.
+        with redirect_stdout(sys.stderr):
+            summary = runner.run(urls, checkpoint, retry_failed=args.retry_failed, on_result=on_result)
+    finally:
+        checkpoint.close()
+        browser_pool.shutdown()
+        storage_manager.stop()
+        storage_manager.compress_pending()
+
+    text = json.dumps(summary, indent=2)
+    print(text)
+    if args.report:
+        with open(args.report, 'w') as f:
+            f.write(text + "\n")
+    return 1 if summary["failed"] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
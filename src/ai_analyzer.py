@@ -1,17 +1,20 @@
 # src/ai_analyzer.py
 
 import os
-import json
 import google.generativeai as genai
-from PIL import Image
+from src.ai_client import AIClient
+from src.metrics import instrumented, FALLBACKS
 
 class AIAnalyzer:
     """
     Handles Vision Analysis using Google Gemini to understand brand aesthetics.
     """
-    def __init__(self):
+    def __init__(self, vision_model=None, cache=None):
+        """`vision_model` replaces the Gemini model (e.g. with a fake in benchmarks); `cache` stores answers."""
         self.api_key = os.environ.get("GOOGLE_API_KEY")
-        if self.api_key:
+        if vision_model is not None:
+            self.vision_model = vision_model
+        elif self.api_key:
             try:
                 genai.configure(api_key=self.api_key)
                 self.vision_model = genai.GenerativeModel('gemini-pro-vision')
@@ -22,31 +25,25 @@ class AIAnalyzer:
         else:
             self.vision_model = None
             print("AI Analyzer: GOOGLE_API_KEY not set. Using mock analysis.")
+        self.client = AIClient(self.vision_model, cache=cache) if self.vision_model else None
 
-    def get_structured_analysis(self, screenshot_path, colors):
+    @instrumented("ai.get_structured_analysis")
+    def get_structured_analysis(self, screenshot_path, colors, force_refresh=False):
         """
         Generates a structured analysis including aesthetics and recommendations.
+        Falls back to a mock analysis if the model fails after all retries or does not answer within AI_TIMEOUT.
         """
-        if not self.vision_model:
+        if not self.client:
             return self._get_mock_analysis(colors)
         try:
-            img = Image.open(screenshot_path)
-            prompt = """
-            Analyze the visual style of this website screenshot. Based on your analysis, provide a JSON object with two keys:
-            1. "brand_aesthetics": A 2-3 sentence paragraph describing the site's aesthetic (e.g., minimalist, corporate, playful), layout, and mood.
-            2. "design_recommendations": A JSON array of 3 short, actionable design recommendations for creating branded merchandise.
-            """
-            prompt_parts = [prompt, img]
-            response = self.vision_model.generate_content(prompt_parts)
-            cleaned_response = response.text.strip().replace("```json", "").replace("```", "")
-            analysis_data = json.loads(cleaned_response)
-            return analysis_data
+            return self.client.analyze(screenshot_path, colors, force_refresh)
         except Exception as e:
             print(f"Error calling or parsing Google Gemini API response: {e}")
             return self._get_mock_analysis(colors)
 
     def _get_mock_analysis(self, colors):
         """Provides a fallback structured analysis."""
+        FALLBACKS.labels(kind="mock_ai_analysis").inc()
         aesthetics = "Based on the visual analysis, the brand aesthetic appears to be modern and minimalist."
         recommendations = [
             f"Use the primary color ({colors[0]}) for main backgrounds.",
@@ -55,5 +52,6 @@ class AIAnalyzer:
         ]
         return {
             "brand_aesthetics": aesthetics,
-            "design_recommendations": recommendations
+            "design_recommendations": recommendations,
+            "is_mock": True
         }
\ No newline at end of file
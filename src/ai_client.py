@@ -0,0 +1,260 @@
+# src/ai_client.py
+
+import io
+import os
+import json
+import time
+import random
+import threading
+import contextvars
+from queue import Queue, Empty
+from concurrent.futures import Future, ThreadPoolExecutor
+from PIL import Image
+from src.analysis_cache import hash_key
+from src.metrics import timed, AI_REQUESTS
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    _RETRYABLE_API_ERRORS = (google_exceptions.TooManyRequests, google_exceptions.ResourceExhausted,
+                             google_exceptions.ServiceUnavailable, google_exceptions.DeadlineExceeded,
+                             google_exceptions.InternalServerError)
+except ImportError:
+    _RETRYABLE_API_ERRORS = ()
+
+AI_IMAGE_MAX_SIDE = int(os.environ.get("AI_IMAGE_MAX_SIDE", 1024))
+AI_IMAGE_QUALITY = int(os.environ.get("AI_IMAGE_QUALITY", 80))
+AI_REQUESTS_PER_MINUTE = float(os.environ.get("AI_REQUESTS_PER_MINUTE", 60))
+AI_BURST = int(os.environ.get("AI_BURST", 5))
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", 4))
+AI_MAX_RETRIES = int(os.environ.get("AI_MAX_RETRIES", 3))
+AI_BATCH_SIZE = int(os.environ.get("AI_BATCH_SIZE", 4))
+AI_BATCH_WINDOW_MS = int(os.environ.get("AI_BATCH_WINDOW_MS", 100))
+AI_TIMEOUT = float(os.environ.get("AI_TIMEOUT", 90))
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# Bump when the prompts change so cached answers to the old prompts are not reused.
+PROMPT_VERSION = 1
+
+SINGLE_PROMPT = """
+Analyze the visual style of this website screenshot. Based on your analysis, provide a JSON object with two keys:
+1. "brand_aesthetics": A 2-3 sentence paragraph describing the site's aesthetic (e.g., minimalist, corporate, playful), layout, and mood.
+2. "design_recommendations": A JSON array of 3 short, actionable design recommendations for creating branded merchandise.
+"""
+
+BATCH_PROMPT = """
+Analyze the visual style of each of the {count} website screenshots that follow, separately and in order.
+Return a JSON array with exactly {count} objects, one per screenshot in the same order. Each object has two keys:
+1. "brand_aesthetics": A 2-3 sentence paragraph describing the site's aesthetic (e.g., minimalist, corporate, playful), layout, and mood.
+2. "design_recommendations": A JSON array of 3 short, actionable design recommendations for creating branded merchandise.
+"""
+
+class InvalidResponseError(ValueError):
+    """Raised when the model answers, but not with the expected JSON."""
+
+def perceptual_hash(img, hash_size=16):
+    """
+    Returns a difference hash (dHash) of an image as hex. Re-encoded or slightly
+    changed screenshots of the same page usually get the same hash.
+    """
+    gray = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = gray.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+def encode_image(img, max_side=AI_IMAGE_MAX_SIDE, quality=AI_IMAGE_QUALITY):
+    """Downscales an image and compresses it to JPEG. Returns an inline image part for the model."""
+    img = img.convert('RGB')
+    img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return {"mime_type": "image/jpeg", "data": buffer.getvalue()}
+
+def _valid_analysis(data):
+    return (isinstance(data, dict) and isinstance(data.get("brand_aesthetics"), str)
+            and isinstance(data.get("design_recommendations"), list))
+
+def parse_analysis(text, expected=None):
+    """
+    Parses a model answer into one analysis dict, or into a list of `expected` dicts for a batch.
+    Raises InvalidResponseError if the answer does not have that shape.
+    """
+    cleaned = text.strip().replace("```json", "").replace("```", "")
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise InvalidResponseError(f"Response is not valid JSON: {e}")
+    if expected is None:
+        if not _valid_analysis(data):
+            raise InvalidResponseError("Response is missing the analysis keys.")
+        return data
+    if not isinstance(data, list) or len(data) != expected or not all(_valid_analysis(item) for item in data):
+        raise InvalidResponseError(f"Expected a JSON array of {expected} analyses.")
+    return data
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, in bursts of up to `capacity`. A rate of 0 means no limit."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+class _Request:
+    def __init__(self, key, image_part):
+        self.key = key
+        self.image_part = image_part
+        self.future = Future()
+        # The submitter's context, so the model call's spans land in its trace.
+        self.context = contextvars.copy_context()
+
+class AIClient:
+    """
+    Sends screenshot analyses to a vision model within a request budget.
+
+    Screenshots are downscaled and sent as JPEG. Answers are cached by the
+    screenshot's perceptual hash and palette, and identical requests in flight
+    share one call. Requests that arrive within `batch_window_ms` of each other
+    are sent together as one multi-image call, so queued analyses share quota.
+    Calls are limited by a token bucket and `max_concurrency`, and rate limit,
+    server and malformed-answer errors are retried with exponential backoff.
+    """
+    def __init__(self, model, cache=None, requests_per_minute=AI_REQUESTS_PER_MINUTE, burst=AI_BURST,
+                 max_concurrency=AI_MAX_CONCURRENCY, max_retries=AI_MAX_RETRIES,
+                 batch_size=AI_BATCH_SIZE, batch_window_ms=AI_BATCH_WINDOW_MS):
+        self.model = model
+        self.cache = cache
+        self.max_retries = max_retries
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window_ms / 1000
+        self._bucket = TokenBucket(requests_per_minute / 60, burst)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="ai-client")
+        self._queue = Queue()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._dispatch, daemon=True, name="ai-dispatcher").start()
+
+    def submit(self, image_path, colors, force_refresh=False):
+        """Queues an analysis of a screenshot and returns a Future of its analysis dict."""
+        with Image.open(image_path) as img:
+            key = hash_key(perceptual_hash(img), colors, PROMPT_VERSION)
+            if self.cache and not force_refresh:
+                cached = self.cache.get("ai_analysis", key)
+                if cached:
+                    future = Future()
+                    future.set_result(cached)
+                    return future
+            with self._lock:
+                existing = self._in_flight.get(key)
+                if existing:
+                    return existing.future
+                request = self._in_flight[key] = _Request(key, None)
+            try:
+                request.image_part = encode_image(img)
+            except Exception as e:
+                self._finish(request, error=e)
+                return request.future
+        self._queue.put(request)
+        return request.future
+
+    def analyze(self, image_path, colors, force_refresh=False, timeout=AI_TIMEOUT):
+        """
+        Analyzes one screenshot, blocking until the answer arrives. Raises if every
+        attempt fails, or TimeoutError if there is no answer within `timeout` seconds.
+        A late answer is still cached for the next analysis of the same screenshot.
+        """
+        return self.submit(image_path, colors, force_refresh).result(timeout=timeout)
+
+    def _dispatch(self):
+        """Groups queued requests into batches, waiting for a free slot first so a backlog batches up."""
+        while True:
+            self._slots.acquire()
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        try:
+            if len(batch) > 1:
+                parts = [BATCH_PROMPT.format(count=len(batch))] + [request.image_part for request in batch]
+                try:
+                    # One call answers the whole batch; its spans go to the first request's trace.
+                    results = batch[0].context.run(self._call, parts, expected=len(batch), retry_invalid=False)
+                except InvalidResponseError as e:
+                    print(f"AI Client: Batch answer was unusable, analyzing one by one. {e}")
+                except Exception as e:
+                    for request in batch:
+                        self._finish(request, error=e)
+                    return
+                else:
+                    for request, result in zip(batch, results):
+                        self._finish(request, result=result)
+                    return
+            for request in batch:
+                try:
+                    self._finish(request, result=request.context.run(self._call, [SINGLE_PROMPT, request.image_part]))
+                except Exception as e:
+                    self._finish(request, error=e)
+        finally:
+            self._slots.release()
+
+    def _call(self, parts, expected=None, retry_invalid=True):
+        """Calls the model within the rate limit, retrying transient errors with jittered exponential backoff."""
+        retryable = (ConnectionError, TimeoutError) + _RETRYABLE_API_ERRORS
+        if retry_invalid:
+            retryable += (InvalidResponseError,)
+        for attempt in range(self.max_retries + 1):
+            self._bucket.acquire()
+            try:
+                with timed("ai.generate_content"):
+                    response = self.model.generate_content(parts)
+                result = parse_analysis(response.text, expected)
+                AI_REQUESTS.labels(outcome="ok").inc()
+                return result
+            except retryable as e:
+                if attempt == self.max_retries:
+                    AI_REQUESTS.labels(outcome="error").inc()
+                    raise
+                AI_REQUESTS.labels(outcome="retry").inc()
+                delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"AI Client: Attempt {attempt + 1} failed ({e}). Retrying in {delay:.1f}s.")
+                time.sleep(delay)
+            except Exception:
+                AI_REQUESTS.labels(outcome="error").inc()
+                raise
+
+    def _finish(self, request, result=None, error=None):
+        with self._lock:
+            if self._in_flight.get(request.key) is request:
+                del self._in_flight[request.key]
+        if error is not None:
+            request.future.set_exception(error)
+            return
+        if self.cache:
+            self.cache.put("ai_analysis", request.key, result)
+        request.future.set_result(result)
@@ -0,0 +1,184 @@
+# src/analysis_cache.py
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from src.metrics import CACHE_REQUESTS
+
+CACHE_DIR = os.environ.get("ANALYSIS_CACHE_DIR", "cache")
+CACHE_MAX_BYTES = int(os.environ.get("ANALYSIS_CACHE_MAX_BYTES", 500 * 1024 * 1024))
+# Eviction trims the cache to this share of max_bytes, so the next one is many writes away.
+LOW_WATER_MARK = 0.9
+
+HOUR = 60 * 60
+DEFAULT_TTLS = {
+    "analysis": 1 * HOUR,
+    "page": 7 * 24 * HOUR,
+    "logo_candidates": 24 * HOUR,
+    "logo": 7 * 24 * HOUR,
+    "screenshot": 24 * HOUR,
+    "palette": 30 * 24 * HOUR,
+    "ai_analysis": 7 * 24 * HOUR,
+}
+
+def hash_key(*parts):
+    """Builds a stable cache key from any JSON-serializable parts."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+def file_hash(path):
+    """Returns the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class AnalysisCache:
+    """
+    A content-addressed on-disk cache for analysis artifacts.
+
+    Each artifact type has its own TTL. An entry is a JSON value and, optionally,
+    a copy of a file (e.g. the screenshot) which is restored to its original path
+    on a hit if that file has since been removed or overwritten. The cache is kept
+    under `max_bytes` by evicting the least recently used entries. Writes only
+    update a running total of the cache size; the cache directory is scanned
+    once on first use and again only when that total goes over the limit.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttls=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_paths(self, artifact, key):
+        base = os.path.join(self.cache_dir, artifact, key)
+        return base + ".json", base + ".bin"
+
+    def get(self, artifact, key):
+        """Returns the cached value, or None if it is missing, expired or its file cannot be restored."""
+        value = self._get(artifact, key)
+        CACHE_REQUESTS.labels(cache="analysis", artifact=artifact, result="miss" if value is None else "hit").inc()
+        return value
+
+    def _get(self, artifact, key):
+        meta_path, blob_path = self._entry_paths(artifact, key)
+        try:
+            with open(meta_path, 'r') as f:
+                entry = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            return None
+        if time.time() - entry["created"] > self.ttls.get(artifact, 0):
+            self._add_bytes(-self._remove(meta_path, blob_path))
+            return None
+        if entry.get("file") and not self._restore_file(entry["file"], blob_path):
+            self._add_bytes(-self._remove(meta_path, blob_path))
+            return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return entry["value"]
+
+    def put(self, artifact, key, value, file_path=None):
+        """Stores a value, plus a copy of `file_path` if given, then enforces the size limit."""
+        meta_path, blob_path = self._entry_paths(artifact, key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        replaced_bytes = self._entry_size(meta_path, blob_path)
+        entry = {"created": time.time(), "value": value}
+        try:
+            if file_path:
+                tmp_blob = f"{blob_path}.{threading.get_ident()}.tmp"
+                shutil.copyfile(file_path, tmp_blob)
+                os.replace(tmp_blob, blob_path)
+                entry["file"] = {"path": file_path, "sha256": file_hash(blob_path)}
+            tmp_meta = f"{meta_path}.{threading.get_ident()}.tmp"
+            with open(tmp_meta, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_meta, meta_path)
+        except (IOError, OSError) as e:
+            print(f"Analysis Cache: Could not store {artifact} entry. {e}")
+            return
+        self._add_bytes(self._entry_size(meta_path, blob_path) - replaced_bytes)
+
+    def invalidate(self, artifact, key):
+        self._add_bytes(-self._remove(*self._entry_paths(artifact, key)))
+
+    def _restore_file(self, file_info, blob_path):
+        """Makes sure the cached file is present at its original path with the cached contents."""
+        path = file_info["path"]
+        try:
+            if os.path.exists(path) and file_hash(path) == file_info["sha256"]:
+                return True
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            shutil.copyfile(blob_path, path)
+            return True
+        except (IOError, OSError):
+            return False
+
+    def _entry_size(self, *paths):
+        size = 0
+        for path in paths:
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _remove(self, *paths):
+        """Removes files and returns how many bytes they took."""
+        freed = 0
+        for path in paths:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+    def _add_bytes(self, delta):
+        """Updates the running cache size, evicting if a write pushed it over `max_bytes`."""
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes = max(0, self._total_bytes + delta)
+            over = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over and delta > 0:
+            self._evict()
+
+    def _evict(self):
+        """
+        Measures the cache and, if it is over `max_bytes`, removes least recently
+        used entries until it is under the low-water mark. Other processes
+        sharing the directory make the running total drift; this corrects it.
+        """
+        with self._lock:
+            entries, total = [], 0
+            for artifact in os.listdir(self.cache_dir):
+                artifact_dir = os.path.join(self.cache_dir, artifact)
+                if not os.path.isdir(artifact_dir):
+                    continue
+                for name in os.listdir(artifact_dir):
+                    if not name.endswith(".json"):
+                        continue
+                    meta_path = os.path.join(artifact_dir, name)
+                    blob_path = meta_path[:-len(".json")] + ".bin"
+                    try:
+                        size = os.path.getsize(meta_path)
+                        if os.path.exists(blob_path):
+                            size += os.path.getsize(blob_path)
+                        entries.append((os.path.getmtime(meta_path), size, meta_path, blob_path))
+                    except OSError:
+                        continue
+                    total += size
+            if total > self.max_bytes:
+                for _, size, meta_path, blob_path in sorted(entries):
+                    self._remove(meta_path, blob_path)
+                    total -= size
+                    if total <= self.max_bytes * LOW_WATER_MARK:
+                        break
+            self._total_bytes = total
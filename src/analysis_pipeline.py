@@ -0,0 +1,190 @@
+# src/analysis_pipeline.py
+
+import os
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.website_analyzer import WebsiteAnalyzer, normalize_url
+from src.analysis_cache import hash_key, file_hash
+from src.palette import PALETTE_VERSION
+from src.metrics import timed, FALLBACKS
+from src.storage_manager import resolve_artifact
+
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", 8))
+FALLBACK_COLORS = ['#7A5CFA', '#1A2238', '#FFFFFF', '#9DA3B0', '#3C4A5A']
+
+_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+
+class AnalysisError(Exception):
+    """Raised when a required pipeline stage fails. The message is safe to show to users."""
+
+class Pipeline:
+    """
+    Runs a set of named stages as soon as the stages they depend on have finished.
+    Each stage function receives a dict with the results of its dependencies.
+    """
+    def __init__(self, executor=None):
+        self.executor = executor or _executor
+        self.stages = {}
+
+    def add_stage(self, name, func, depends_on=()):
+        for dep in depends_on:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'.")
+        self.stages[name] = (func, tuple(depends_on))
+        return self
+
+    def _timed(self, name, func, inputs, on_progress):
+        if on_progress: on_progress(name, "running")
+        start = time.perf_counter()
+        try:
+            with timed(f"pipeline.{name}"):
+                result = func(inputs)
+        except Exception:
+            if on_progress: on_progress(name, "failed")
+            raise
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 4)
+        if on_progress: on_progress(name, "done")
+        return result
+
+    def run(self, on_progress=None):
+        """
+        Runs every stage and returns the results by stage name. Stage errors propagate.
+        `on_progress(stage, status)` is called as stages start, finish or fail.
+        """
+        self.timings = {}
+        results, running = {}, {}
+        pending = dict(self.stages)
+        start = time.perf_counter()
+        while pending or running:
+            for name, (func, deps) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    inputs = {dep: results[dep] for dep in deps}
+                    # Copy the context so the stage's spans land in the caller's trace.
+                    context = contextvars.copy_context()
+                    running[self.executor.submit(context.run, self._timed, name, func, inputs, on_progress)] = name
+                    del pending[name]
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+        self.timings["total"] = round(time.perf_counter() - start, 4)
+        return results
+
+STAGES = ["fetch_html", "screenshot", "logo", "colors", "ai_analysis"]
+
+def run_analysis(url, ai_analyzer, browser_pool=None, on_progress=None, cache=None, force_refresh=False):
+    """
+    Runs the full website analysis with independent stages in parallel.
+    Returns (analysis, timings) where analysis has the `domain` and `base_analysis` keys.
+
+    With a `cache`, a recent analysis of the same URL is returned without any
+    work, and otherwise each stage reuses artifacts cached for the same page
+    content. `force_refresh` skips cache reads but still stores fresh results.
+    """
+    start = time.perf_counter()
+    use_cache = cache is not None and not force_refresh
+    normalized_url = normalize_url(url)
+    url_key = hash_key(normalized_url)
+
+    if use_cache:
+        cached = cache.get("analysis", url_key)
+        if cached and _artifacts_exist(cached):
+            for stage in STAGES:
+                if on_progress: on_progress(stage, "done")
+            return cached, {"total": round(time.perf_counter() - start, 4)}
+
+    analyzer = WebsiteAnalyzer(url, browser_pool=browser_pool)
+    # If this URL was seen before, wait for its HTML so an unchanged page can reuse the cached screenshot.
+    known_page = use_cache and cache.get("page", url_key) is not None
+
+    captured = []
+
+    def page_key():
+        return hash_key(normalized_url, analyzer.content_hash)
+
+    def fetch_html(_):
+        if not analyzer.fetch_and_parse_html():
+            raise AnalysisError("Analysis failed: Could not fetch or parse the website's HTML.")
+        return analyzer.soup
+
+    def screenshot(_):
+        if known_page:
+            cached = cache.get("screenshot", page_key())
+            if cached: return cached
+        screenshot_path = analyzer.capture_screenshot()
+        if not screenshot_path:
+            raise AnalysisError("Analysis failed: Could not capture a screenshot. The site may be blocking automation.")
+        captured.append(screenshot_path)
+        return screenshot_path
+
+    def logo(_):
+        candidates = cache.get("logo_candidates", page_key()) if use_cache else None
+        if candidates is None:
+            candidates = analyzer.get_logo_candidates()
+            if cache: cache.put("logo_candidates", page_key(), candidates)
+        cached = cache.get("logo", page_key()) if use_cache else None
+        if cached is not None:
+            logo_path = cached["path"]
+        else:
+            logo_path = analyzer.get_logo(candidates)
+            if cache: cache.put("logo", page_key(), {"path": logo_path}, file_path=logo_path)
+        if not logo_path:
+            print("WARNING: No suitable logo found. Proceeding without a logo.")
+            FALLBACKS.labels(kind="no_logo").inc()
+        return logo_path
+
+    def colors(inputs):
+        # The palette extractor reads raster images only, so SVG logos use the screenshot instead.
+        logo_path = inputs["logo"]
+        source_image_for_colors = logo_path if logo_path and not logo_path.lower().endswith('.svg') else inputs["screenshot"]
+        palette_key = hash_key(file_hash(source_image_for_colors), 6, PALETTE_VERSION) if cache and os.path.exists(source_image_for_colors) else None
+        if use_cache and palette_key:
+            cached = cache.get("palette", palette_key)
+            if cached: return cached
+        colors = analyzer.get_brand_colors(source_image_for_colors, 6)
+        if not colors or len(colors) < 2:
+            print("WARNING: Could not extract a full color palette. Using fallback colors.")
+            colors = list(FALLBACK_COLORS)
+            FALLBACKS.labels(kind="fallback_palette").inc()
+        if palette_key: cache.put("palette", palette_key, colors)
+        return colors
+
+    def ai(inputs):
+        # The AI analyzer caches answers itself, by perceptual hash of the screenshot and palette.
+        ai_analysis = ai_analyzer.get_structured_analysis(inputs["screenshot"], inputs["colors"], force_refresh=force_refresh)
+        if not ai_analysis or "brand_aesthetics" not in ai_analysis:
+            raise AnalysisError("Analysis failed: The AI model could not return a valid analysis of the screenshot.")
+        return ai_analysis
+
+    pipeline = Pipeline()
+    pipeline.add_stage("fetch_html", fetch_html)
+    pipeline.add_stage("screenshot", screenshot, depends_on=["fetch_html"] if known_page else [])
+    pipeline.add_stage("logo", logo, depends_on=["fetch_html"])
+    pipeline.add_stage("colors", colors, depends_on=["logo", "screenshot"])
+    pipeline.add_stage("ai_analysis", ai, depends_on=["screenshot", "colors"])
+    results = pipeline.run(on_progress=on_progress)
+
+    screenshot_path, logo_path = results["screenshot"], results["logo"]
+    ai_analysis = results["ai_analysis"]
+    analysis = {
+        "domain": analyzer.domain,
+        "base_analysis": {
+            "screenshot_path": screenshot_path.replace(os.path.sep, '/'),
+            "logo_path": logo_path.replace(os.path.sep, '/') if logo_path else None,
+            "colors": results["colors"],
+            "ai_description": ai_analysis.get("brand_aesthetics", "AI analysis could not determine aesthetics."),
+            "ai_recommendations": ai_analysis.get("design_recommendations", [])
+        }
+    }
+    if cache:
+        cache.put("page", url_key, analyzer.content_hash)
+        if captured: cache.put("screenshot", page_key(), screenshot_path, file_path=screenshot_path)
+        cache.put("analysis", url_key, analysis)
+    return analysis, pipeline.timings
+
+def _artifacts_exist(analysis):
+    """A cached analysis is only usable while the files it points to are still on disk."""
+    base = analysis.get("base_analysis", {})
+    paths = [base.get("screenshot_path"), base.get("logo_path")]
+    return all(resolve_artifact(path) for path in paths if path)
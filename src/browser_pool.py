@@ -0,0 +1,160 @@
+# src/browser_pool.py
+
+import os
+import threading
+from contextlib import contextmanager
+from queue import Queue, Empty
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service as ChromeService
+from webdriver_manager.chrome import ChromeDriverManager
+
+DEFAULT_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 2))
+DEFAULT_MAX_USES = int(os.environ.get("BROWSER_MAX_USES", 50))
+DEFAULT_PAGE_LOAD_TIMEOUT = int(os.environ.get("BROWSER_PAGE_LOAD_TIMEOUT", 30))
+# Whether the server starts its drivers in the background at startup.
+WARM_UP_ON_START = os.environ.get("BROWSER_WARM_UP", "1") != "0"
+
+class BrowserPool:
+    """
+    Keeps a bounded set of warm headless Chrome drivers and leases them out.
+    Drivers are reset between leases and recycled when they crash or get old.
+    """
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_uses=DEFAULT_MAX_USES,
+                 page_load_timeout=DEFAULT_PAGE_LOAD_TIMEOUT, driver_factory=None):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.page_load_timeout = page_load_timeout
+        self._driver_factory = driver_factory or self._create_chrome_driver
+        self._idle = Queue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._uses = {}
+        self._service_path = None
+        self._closed = False
+
+    def _chrome_options(self):
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument("--hide-scrollbars")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        return options
+
+    def _create_chrome_driver(self):
+        """Starts a new Chrome process. The driver binary is only resolved once."""
+        with self._lock:
+            if not self._service_path:
+                self._service_path = ChromeDriverManager().install()
+        driver = webdriver.Chrome(service=ChromeService(self._service_path), options=self._chrome_options())
+        driver.set_page_load_timeout(self.page_load_timeout)
+        return driver
+
+    def _new_driver(self):
+        driver = self._driver_factory()
+        self._uses[id(driver)] = 0
+        return driver
+
+    def _is_healthy(self, driver):
+        """A driver is healthy if the browser still answers and it has not hit its use limit."""
+        if self._uses.get(id(driver), 0) >= self.max_uses:
+            return False
+        try:
+            return len(driver.window_handles) > 0
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Clears cookies, storage and the current page so no state leaks between leases."""
+        try:
+            driver.delete_all_cookies()
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            print(f"Browser Pool: Could not reset driver, recycling it. {e}")
+            return False
+
+    def _discard(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _acquire_driver(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except Empty:
+                return self._new_driver()
+            if self._is_healthy(driver):
+                return driver
+            self._discard(driver)
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Leases a driver for the duration of the `with` block.
+        Blocks while all slots are busy; raises TimeoutError after `timeout` seconds.
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool has been shut down.")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a free browser.")
+        driver = None
+        try:
+            driver = self._acquire_driver()
+            self._uses[id(driver)] += 1
+            yield driver
+        finally:
+            if driver is not None:
+                if not self._closed and self._reset(driver) and self._is_healthy(driver):
+                    self._idle.put(driver)
+                else:
+                    self._discard(driver)
+            self._slots.release()
+
+    def warm_up(self, count=None):
+        """
+        Starts drivers ahead of time so the first requests skip the cold start.
+        Safe to run while the pool is in use: each driver is started under a
+        free slot, and warm-up stops once the pool has `size` live drivers.
+        """
+        started = 0
+        for _ in range(count or self.size):
+            if self._closed or len(self._uses) >= self.size or not self._slots.acquire(blocking=False):
+                break
+            try:
+                driver = self._new_driver()
+                if self._closed:
+                    self._discard(driver)
+                    break
+                self._idle.put(driver)
+                started += 1
+            except Exception as e:
+                print(f"Browser Pool: Could not start a warm driver. {e}")
+                break
+            finally:
+                self._slots.release()
+        return started
+
+    def shutdown(self):
+        """Quits every idle driver. Leased drivers are quit when they are returned."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Empty:
+                break
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+def get_browser_pool():
+    """Returns the process-wide browser pool, creating it on first use."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool()
+        return _default_pool
@@ -0,0 +1,190 @@
+# src/bulk_runner.py
+
+import os
+import csv
+import json
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.analysis_pipeline import run_analysis, STAGES
+from src.template_generator import TemplateGenerator, TEMPLATES
+from src.website_analyzer import normalize_url, domain_of
+from src.thumbnails import make_thumbnail
+from src.metrics import percentile
+
+# Relative, like the `assets/<domain>/...` paths in the analysis, so history records survive a moved checkout.
+OUTPUT_DIR = 'output'
+
+def read_urls(path):
+    """
+    Reads URLs from a text file (one per line, `#` starts a comment) or a CSV
+    file with a `url` column (or URLs in its first column). Duplicates are dropped.
+    """
+    with open(path, newline='') as f:
+        if path.lower().endswith('.csv'):
+            rows = list(csv.reader(f))
+            header = [cell.strip().lower() for cell in rows[0]] if rows else []
+            column = header.index('url') if 'url' in header else 0
+            values = [row[column] for row in rows[1 if 'url' in header else 0:] if len(row) > column]
+        else:
+            values = [line.split('#', 1)[0] for line in f]
+    urls, seen = [], set()
+    for value in values:
+        value = value.strip()
+        if value and normalize_url(value) not in seen:
+            seen.add(normalize_url(value))
+            urls.append(value)
+    return urls
+
+class Checkpoint:
+    """
+    An append-only JSON-lines log of finished URLs. Lines are only written
+    after the matching history records are committed, so a crashed run can be
+    resumed by skipping every URL in the log.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash.
+                    self.entries[entry["url"]] = entry
+        self._file = open(path, 'a')
+
+    def record(self, entries):
+        for entry in entries:
+            self._file.write(json.dumps(entry) + "\n")
+            self.entries[entry["url"]] = entry
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+class BulkRunner:
+    """
+    Analyzes many URLs and renders their merchandise designs.
+    Analyses run on a thread pool that shares one browser pool, and each
+    site's renders run on the template generator's process pool. Finished
+    analyses are saved to history in batches of `flush_every`.
+    """
+    def __init__(self, ai_analyzer, history_manager, browser_pool, cache=None, workers=4,
+                 templates=TEMPLATES, num_colors=1, flush_every=20, force_refresh=False, generator_url=None,
+                 storage_manager=None):
+        self.ai_analyzer = ai_analyzer
+        self.history_manager = history_manager
+        self.browser_pool = browser_pool
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.templates = templates
+        self.num_colors = num_colors
+        self.flush_every = max(1, flush_every)
+        self.force_refresh = force_refresh
+        self.generator_url = generator_url
+        self.storage_manager = storage_manager
+        self._pending = []
+
+    def _process(self, url):
+        """Analyzes and renders one URL. Returns the history record and the per-stage timings."""
+        in_use = self.storage_manager.in_use(domain_of(url)) if self.storage_manager else nullcontext()
+        with in_use:
+            analysis, timings = run_analysis(url, self.ai_analyzer, browser_pool=self.browser_pool,
+                                             cache=self.cache, force_refresh=self.force_refresh)
+            base = analysis["base_analysis"]
+            make_thumbnail(base["screenshot_path"])
+        if self.storage_manager:
+            self.storage_manager.schedule_compression(base["screenshot_path"])
+        start = time.perf_counter()
+        generator = TemplateGenerator(os.path.join(OUTPUT_DIR, analysis["domain"]), analysis["domain"])
+        colors = base["colors"][:self.num_colors]
+        accent_color = base["colors"][1] if len(base["colors"]) > 1 else "#333333"
+        renders = generator.render_batch(base["logo_path"], colors, self.templates, accent_color=accent_color)
+        timings["render"] = round(time.perf_counter() - start, 4)
+        designs = {template: {color: result for color, result in by_color.items() if result}
+                   for template, by_color in renders.items()}
+        record = {**analysis, "designs": designs}
+        if self.generator_url:
+            record["generator_url"] = self.generator_url
+        return record, timings
+
+    def _flush(self, checkpoint):
+        """Saves pending records to history in one transaction, then marks their URLs done."""
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        saved = self.history_manager.save_many([record for record, _ in pending])
+        checkpoint.record([{**entry, "history_id": record["id"]} for record, (_, entry) in zip(saved, pending)])
+
+    @staticmethod
+    def pending_urls(urls, checkpoint, retry_failed=False):
+        """The URLs a run still has to process: those not in the checkpoint, plus earlier failures if retrying."""
+        todo = []
+        for url in urls:
+            previous = checkpoint.entries.get(normalize_url(url))
+            if not previous or (previous["status"] == "failed" and retry_failed):
+                todo.append(url)
+        return todo
+
+    def run(self, urls, checkpoint, retry_failed=False, on_result=None):
+        """
+        Processes every URL not already in the checkpoint and returns a summary report.
+        `on_result(entry)` is called as each URL finishes.
+        """
+        todo = self.pending_urls(urls, checkpoint, retry_failed)
+        skipped = len(urls) - len(todo)
+        results = []
+        start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk")
+        try:
+            futures = {executor.submit(self._timed_process, url): url for url in todo}
+            for future in as_completed(futures):
+                entry = {"url": normalize_url(futures[future]), "seconds": None}
+                try:
+                    record, timings, seconds = future.result()
+                except Exception as e:
+                    entry.update(status="failed", error=str(e))
+                    # Failures have no history record, so they can be checkpointed right away.
+                    checkpoint.record([entry])
+                else:
+                    entry.update(status="done", seconds=seconds, timings=timings)
+                    self._pending.append((record, entry))
+                    if len(self._pending) >= self.flush_every:
+                        self._flush(checkpoint)
+                results.append(entry)
+                if on_result: on_result(entry)
+        finally:
+            # On Ctrl+C, drop queued URLs but keep everything that already finished.
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._flush(checkpoint)
+        return self._summary(results, skipped, time.perf_counter() - start)
+
+    def _timed_process(self, url):
+        start = time.perf_counter()
+        record, timings = self._process(url)
+        return record, timings, round(time.perf_counter() - start, 4)
+
+    def _summary(self, results, skipped, wall_seconds):
+        done = [entry for entry in results if entry["status"] == "done"]
+        latencies = [entry["seconds"] for entry in done]
+        stages = {}
+        for stage in STAGES + ["total", "render"]:
+            values = [entry["timings"][stage] for entry in done if stage in entry.get("timings", {})]
+            if values:
+                stages[stage] = {"mean_seconds": round(sum(values) / len(values), 4),
+                                 "p95_seconds": percentile(values, 95)}
+        return {
+            "processed": len(results),
+            "succeeded": len(done),
+            "failed": len(results) - len(done),
+            "skipped": skipped,
+            "wall_seconds": round(wall_seconds, 4),
+            "throughput_per_minute": round(len(results) / wall_seconds * 60, 2) if wall_seconds else None,
+            "p50_seconds": percentile(latencies, 50),
+            "p95_seconds": percentile(latencies, 95),
+            "stages": stages,
+            "failures": [{"url": entry["url"], "error": entry["error"]} for entry in results if entry["status"] == "failed"],
+        }
@@ -2,34 +2,155 @@
 
 import json
 import os
+import sqlite3
+import threading
 from datetime import datetime
 
+def encode_cursor(record):
+    """Encodes a record's sort position as an opaque pagination cursor."""
+    return f"{record['timestamp']}_{record['id']}"
+
+def decode_cursor(cursor):
+    """Decodes a pagination cursor, raising ValueError if it is malformed."""
+    timestamp, _, record_id = cursor.rpartition('_')
+    if not timestamp:
+        raise ValueError(f"Invalid history cursor: {cursor}")
+    return timestamp, int(record_id)
+
+def _domain_key(record):
+    return (record.get('domain') or '').lower() or None
+
 class HistoryManager:
-    """Saves and retrieves analysis results from a local JSON file."""
-    def __init__(self, history_file='history.json'):
-        self.history_file = history_file
-        if not os.path.exists(self.history_file):
-            with open(self.history_file, 'w') as f:
-                json.dump([], f)
-
-    def get_history(self):
-        """Retrieves all historical records, most recent first."""
-        try:
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
-            return sorted(history, key=lambda x: x['timestamp'], reverse=True)
-        except (IOError, json.JSONDecodeError):
-            return []
+    """
+    Saves and retrieves analysis results from a local SQLite database.
+    Records from the older `history.json` file are imported once on first use.
+    """
+    def __init__(self, db_file='history.db', legacy_json_file='history.json'):
+        self.db_file = db_file
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    domain TEXT,
+                    data TEXT NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_domain ON analyses (domain, timestamp, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._migrate_json(legacy_json_file)
+
+    def _connect(self):
+        """Returns this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _migrate_json(self, json_file):
+        """Imports records from the legacy JSON history file, keeping their ids. Runs only once."""
+        conn = self._connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+        records = []
+        if json_file and os.path.exists(json_file):
+            try:
+                with open(json_file, 'r') as f:
+                    records = json.load(f)
+            except (IOError, json.JSONDecodeError):
+                records = []
+        with conn:
+            for record in records:
+                record = dict(record)
+                record_id, timestamp = record.pop('id', None), record.pop('timestamp', None)
+                conn.execute(
+                    "INSERT OR IGNORE INTO analyses (id, timestamp, domain, data) VALUES (?, ?, ?, ?)",
+                    (record_id, timestamp or datetime.now().isoformat(), _domain_key(record), json.dumps(record)))
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('json_migrated', ?)", (datetime.now().isoformat(),))
+        if records:
+            print(f"History Manager: Migrated {len(records)} records from {json_file}.")
+
+    def _to_record(self, row):
+        return {"id": row["id"], "timestamp": row["timestamp"], **json.loads(row["data"])}
+
+    def get_history(self, limit=None, offset=0):
+        """Retrieves historical records, most recent first."""
+        rows = self._connect().execute(
+            "SELECT id, timestamp, data FROM analyses ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+            (limit if limit is not None else -1, offset)).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    def get_page(self, limit=20, cursor=None, domain=None, date_from=None, date_to=None):
+        """
+        Retrieves one page of records, most recent first, with optional filters.
+        `date_from`/`date_to` are inclusive `YYYY-MM-DD` strings. Returns
+        (records, next_cursor); next_cursor is None on the last page.
+        """
+        clauses, params = [], []
+        if domain:
+            clauses.append("domain = ?")
+            params.append(domain.strip().lower())
+        if date_from:
+            clauses.append("timestamp >= ?")
+            params.append(date_from)
+        if date_to:
+            # Timestamps are ISO strings, so anything on `date_to` sorts before the next character after it.
+            clauses.append("timestamp < ?")
+            params.append(date_to + "\uffff")
+        if cursor:
+            timestamp, cursor_id = decode_cursor(cursor)
+            clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend([timestamp, timestamp, cursor_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT id, timestamp, data FROM analyses {where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (*params, limit + 1)).fetchall()
+        records = [self._to_record(row) for row in rows[:limit]]
+        next_cursor = encode_cursor(records[-1]) if records and len(rows) > limit else None
+        return records, next_cursor
+
+    def get_analysis(self, history_id):
+        """Retrieves a single record by id, or None if it does not exist."""
+        row = self._connect().execute(
+            "SELECT id, timestamp, data FROM analyses WHERE id = ?", (history_id,)).fetchone()
+        return self._to_record(row) if row else None
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def referenced_paths(self):
+        """Returns the set of artifact paths (screenshots, logos and designs) that any record points to."""
+        rows = self._connect().execute("""
+            SELECT json_extract(data, '$.base_analysis.screenshot_path'),
+                   json_extract(data, '$.base_analysis.logo_path'),
+                   json_extract(data, '$.designs')
+            FROM analyses""").fetchall()
+        paths = set()
+        for screenshot_path, logo_path, designs in rows:
+            paths.update(path for path in (screenshot_path, logo_path) if path)
+            for by_color in (json.loads(designs) if designs else {}).values():
+                for result in by_color.values():
+                    paths.update(path for path in result.values() if path)
+        return paths
 
     def save_analysis(self, analysis_data):
-        """Saves a new analysis record to the history file."""
-        history = self.get_history()
-        record = {
-            "id": len(history) + 1,
-            "timestamp": datetime.now().isoformat(),
-            **analysis_data
-        }
-        history.insert(0, record)
-        with open(self.history_file, 'w') as f:
-            json.dump(history, f, indent=4)
-        return record
\ No newline at end of file
+        """Saves a new analysis record. The id is assigned atomically by the database."""
+        return self.save_many([analysis_data])[0]
+
+    def save_many(self, analyses):
+        """Saves several analysis records in a single transaction."""
+        conn = self._connect()
+        records = []
+        with conn:
+            for analysis_data in analyses:
+                timestamp = datetime.now().isoformat()
+                cursor = conn.execute(
+                    "INSERT INTO analyses (timestamp, domain, data) VALUES (?, ?, ?)",
+                    (timestamp, _domain_key(analysis_data), json.dumps(analysis_data)))
+                records.append({"id": cursor.lastrowid, "timestamp": timestamp, **analysis_data})
+        return records
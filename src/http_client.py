@@ -0,0 +1,60 @@
+# src/http_client.py
+
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 32))
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_http_session():
+    """Returns the process-wide requests session, which keeps connections alive between requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _session.headers['User-Agent'] = USER_AGENT
+        return _session
+
+def _iter_arriving(response, chunk_size):
+    """
+    Yields body chunks as soon as any bytes arrive. iter_content() waits for a
+    full chunk, which a server sending a few bytes at a time can drag out.
+    """
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None:  # urllib3 < 2
+        yield from response.iter_content(chunk_size)
+        return
+    while True:
+        chunk = read1(chunk_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+def read_capped(response, max_bytes, chunk_size=64 * 1024, deadline=None):
+    """
+    Reads a streamed response body, raising ValueError if it grows past `max_bytes`.
+    With a `deadline` (a time.monotonic() value), raises TimeoutError once it has
+    passed, since the request timeout only bounds each read and a slow server
+    could otherwise trickle bytes for much longer.
+    """
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_bytes:
+        raise ValueError(f"Response is {length} bytes, over the {max_bytes} byte limit.")
+    chunks, total = [], 0
+    for chunk in _iter_arriving(response, chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise ValueError(f"Response exceeded the {max_bytes} byte limit.")
+        chunks.append(chunk)
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"Response not complete after {total} bytes when the deadline passed.")
+    return b''.join(chunks)
@@ -0,0 +1,114 @@
+# src/job_queue.py
+
+import os
+import time
+import uuid
+import threading
+from queue import Queue, Full
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 20))
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 3600))
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+class Job:
+    """A unit of background work with per-step progress that clients can poll."""
+    def __init__(self, key, func, steps=()):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.func = func
+        self.status = "queued"
+        self.steps = {step: "pending" for step in steps}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update_step(self, step, status):
+        """Records the status of a step. Used as the pipeline's `on_progress` callback."""
+        with self._lock:
+            self.steps[step] = status
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        with self._lock:
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "steps": [{"name": name, "status": status} for name, status in self.steps.items()],
+            }
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+        return data
+
+class LocalJobQueue:
+    """
+    An in-process job queue served by a bounded pool of worker threads.
+    Jobs with the same key share one run while it is in flight, and new
+    submissions are rejected with QueueFullError once the queue is full.
+    """
+    def __init__(self, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE, retention=JOB_RETENTION_SECONDS):
+        self.retention = retention
+        self._queue = Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._workers = [threading.Thread(target=self._work, daemon=True, name=f"job-worker-{i}") for i in range(max(1, workers))]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, key, func, steps=()):
+        """
+        Enqueues `func(job)` and returns its Job. If a job with the same key is
+        still queued or running, that job is returned instead.
+        """
+        with self._lock:
+            self._prune()
+            existing = self._in_flight.get(key)
+            if existing:
+                return existing
+            job = Job(key, func, steps)
+            try:
+                self._queue.put_nowait(job)
+            except Full:
+                raise QueueFullError("The analysis queue is full. Please try again shortly.")
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pending_count(self):
+        return self._queue.qsize()
+
+    def _prune(self):
+        """Forgets finished jobs older than the retention period. Caller holds the lock."""
+        cutoff = time.time() - self.retention
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            job.status = "running"
+            try:
+                result, error, status = job.func(job), None, "done"
+            except Exception as e:
+                result, error, status = None, str(e), "failed"
+            job.result, job.error, job.finished_at = result, error, time.time()
+            job.status = status
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+            self._queue.task_done()
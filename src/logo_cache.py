@@ -0,0 +1,131 @@
+# src/logo_cache.py
+
+import os
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+from src.analysis_cache import CACHE_DIR
+from src.metrics import CACHE_REQUESTS
+
+LOGO_CACHE_DIR = os.path.join(CACHE_DIR, "logos")
+LOGO_CACHE_MEMORY_ITEMS = int(os.environ.get("LOGO_CACHE_MEMORY_ITEMS", 128))
+LOGO_CACHE_MAX_BYTES = int(os.environ.get("LOGO_CACHE_MAX_BYTES", 100 * 1024 * 1024))
+
+# Disk entries are raw RGBA pixels behind a (width, height) header, so loading them needs no decoding.
+_HEADER = struct.Struct("<II")
+
+class LogoCache:
+    """
+    A two-tier cache of prepared (decoded and resized) logos.
+    Keys combine the logo's content hash with the target size. Recently used
+    logos stay in an in-process LRU; all logos are also kept on disk, which is
+    trimmed back to `max_bytes` by removing the least recently used files.
+    Cached images are shared and must be treated as read-only.
+    """
+    def __init__(self, cache_dir=LOGO_CACHE_DIR, memory_items=LOGO_CACHE_MEMORY_ITEMS, max_bytes=LOGO_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._source_hashes = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def source_hash(self, path):
+        """Returns the content hash of a logo file, re-hashing only when the file changes."""
+        stat = os.stat(path)
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._source_hashes.get(signature)
+        if cached:
+            return cached
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with self._lock:
+            self._source_hashes[signature] = digest
+        return digest
+
+    @staticmethod
+    def make_key(source_hash, size):
+        return f"{source_hash}_{size[0]}x{size[1]}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key + ".rgba")
+
+    def get(self, key):
+        """Returns the cached image for a key, or None."""
+        with self._lock:
+            img = self._memory.get(key)
+            if img is not None:
+                self._memory.move_to_end(key)
+                CACHE_REQUESTS.labels(cache="logo", artifact="prepared_logo", result="memory_hit").inc()
+                return img
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            width, height = _HEADER.unpack_from(data)
+            img = Image.frombuffer('RGBA', (width, height), data[_HEADER.size:], 'raw', 'RGBA', 0, 1)
+            os.utime(path)
+        except (IOError, OSError, struct.error, ValueError):
+            CACHE_REQUESTS.labels(cache="logo", artifact="prepared_logo", result="miss").inc()
+            return None
+        CACHE_REQUESTS.labels(cache="logo", artifact="prepared_logo", result="disk_hit").inc()
+        self._remember(key, img)
+        return img
+
+    def put(self, key, img):
+        """Stores a prepared RGBA image in both tiers."""
+        self._remember(key, img)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(*img.size))
+                f.write(img.tobytes())
+            os.replace(tmp_path, path)
+        except (IOError, OSError) as e:
+            print(f"Logo Cache: Could not store {key} on disk. {e}")
+            return
+        self._evict_disk()
+
+    def _remember(self, key, img):
+        with self._lock:
+            self._memory[key] = img
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries, total = [], 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".rgba"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_logo_cache():
+    """Returns this process's logo cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LogoCache()
+        return _default_cache
@@ -0,0 +1,104 @@
+# src/logo_discovery.py
+
+import io
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urljoin, unquote
+from PIL import Image
+from src.http_client import get_http_session, read_capped
+
+LOGO_TIMEOUT = int(os.environ.get("LOGO_TIMEOUT", 10))
+LOGO_MAX_BYTES = int(os.environ.get("LOGO_MAX_BYTES", 5 * 1024 * 1024))
+LOGO_FETCH_WORKERS = int(os.environ.get("LOGO_FETCH_WORKERS", 16))
+
+FORMAT_SCORES = {'SVG': 1.0, 'PNG': 0.8, 'WEBP': 0.7, 'JPEG': 0.6, 'GIF': 0.5, 'ICO': 0.3}
+FORMAT_EXTENSIONS = {'SVG': '.svg', 'PNG': '.png', 'WEBP': '.webp', 'JPEG': '.jpg', 'GIF': '.gif', 'ICO': '.ico'}
+# Images at least this many pixels in area get full marks for size.
+FULL_SIZE_AREA = 256 * 256
+MIN_SIDE = 16
+# An SVG document: optional XML declaration, comments and SVG doctype, then the <svg> root.
+# HTML pages (e.g. a soft 404 with inline icons) start with <!DOCTYPE html> or <html> and do not match.
+_SVG_ROOT = re.compile(rb'\s*(?:<\?xml[^>]*\?>\s*)?(?:<!--.*?-->\s*|<!DOCTYPE\s+svg[^>]*>\s*)*<svg[\s>]', re.I | re.S)
+
+def is_svg(data):
+    """True if a downloaded body is an SVG document rather than an image or an HTML page."""
+    return bool(_SVG_ROOT.match(data[:4096].lstrip(b'\xef\xbb\xbf')))
+
+_executor = ThreadPoolExecutor(max_workers=LOGO_FETCH_WORKERS, thread_name_prefix="logo-fetch")
+
+def _fetch_candidate(page_url, src, deadline, max_bytes):
+    """
+    Downloads one candidate and identifies it. Returns (data, format, (width, height)) or None.
+    Gives up once `deadline` passes, so abandoned downloads do not hold a worker.
+    """
+    image_url = urljoin(page_url, unquote(src))
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return None  # Waited in the queue until the discovery had already moved on.
+    try:
+        with get_http_session().get(image_url, stream=True, timeout=remaining) as response:
+            response.raise_for_status()
+            data = read_capped(response, max_bytes, deadline=deadline)
+        if is_svg(data):
+            return data, 'SVG', None
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+            image_format, size = img.format, img.size
+        if image_format not in FORMAT_SCORES or min(size) < MIN_SIDE:
+            return None
+        return data, image_format, size
+    except Exception as e:
+        print(f"Could not download image from {src}: {e}")
+        return None
+
+def score_candidate(rank, total, image_format, size):
+    """
+    Scores a downloaded candidate between 0 and 1. Selector rank matters most,
+    then pixel size (vectors count as full size), then format.
+    """
+    rank_score = 1 - rank / max(total, 1)
+    size_score = 1.0 if size is None else min(size[0] * size[1] / FULL_SIZE_AREA, 1.0)
+    return 0.5 * rank_score + 0.3 * size_score + 0.2 * FORMAT_SCORES[image_format]
+
+def discover_logo(page_url, candidates, assets_dir, timeout=LOGO_TIMEOUT, max_bytes=LOGO_MAX_BYTES):
+    """
+    Fetches all (src, filename_prefix) candidates at once over the shared HTTP
+    session and saves the best scoring one to `assets_dir`. Candidates still
+    downloading after `timeout` seconds are ignored, so the worst case is one
+    timeout rather than one per candidate. Returns the saved path or None.
+    """
+    if not candidates:
+        return None
+    deadline = time.monotonic() + timeout
+    futures = {_executor.submit(_fetch_candidate, page_url, src, deadline, max_bytes): rank
+               for rank, (src, _) in enumerate(candidates)}
+    done, not_done = wait(futures, timeout=timeout)
+    # Queued candidates are dropped here; ones already downloading stop at the deadline.
+    for future in not_done:
+        future.cancel()
+
+    best = None
+    for future in done:
+        result = future.result()
+        if not result:
+            continue
+        rank = futures[future]
+        data, image_format, size = result
+        score = score_candidate(rank, len(candidates), image_format, size)
+        if best is None or (score, -rank) > (best[0], -best[1]):
+            best = (score, rank, data, image_format)
+    if not best:
+        return None
+
+    _, rank, data, image_format = best
+    src, filename_prefix = candidates[rank]
+    image_path = os.path.join(assets_dir, f"{filename_prefix}{FORMAT_EXTENSIONS[image_format]}")
+    tmp_path = f"{image_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, image_path)
+    print(f"Successfully downloaded asset: {urljoin(page_url, unquote(src))}")
+    return image_path
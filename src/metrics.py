@@ -0,0 +1,187 @@
+# src/metrics.py
+
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class _Metric:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def _samples(self):
+        with self._lock:
+            return list(self._children.items())
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+class Counter(_Metric):
+    """A monotonically increasing count, e.g. cache hits."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def expose(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value}" for key, child in self._samples()]
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+class Histogram(_Metric):
+    """A latency distribution with cumulative buckets, e.g. stage durations."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def expose(self):
+        lines = []
+        for key, child in self._samples():
+            for bound, count in zip(child.buckets, child.counts):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {child.count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {child.sum}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {child.count}")
+        return lines
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+class Gauge(_Metric):
+    """A value that can go up and down, e.g. bytes on disk."""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def expose(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {child.value}" for key, child in self._samples()]
+
+STAGE_SECONDS = Histogram("merch_stage_duration_seconds", "Time spent in each analysis and rendering stage.", ["stage"])
+STAGE_FAILURES = Counter("merch_stage_failures_total", "Stages that raised an error.", ["stage"])
+CACHE_REQUESTS = Counter("merch_cache_requests_total", "Cache lookups by cache, artifact and result.", ["cache", "artifact", "result"])
+AI_REQUESTS = Counter("merch_ai_requests_total", "Vision model calls by outcome (ok, retry or error).", ["outcome"])
+FALLBACKS = Counter("merch_fallbacks_total", "Times a degraded fallback was used instead of a real result.", ["kind"])
+STORAGE_BYTES = Gauge("merch_storage_bytes", "Bytes used by per-domain artifacts, by directory.", ["root"])
+STORAGE_EVICTIONS = Counter("merch_storage_evictions_total", "Artifacts deleted to stay under the storage quota.", ["root"])
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers, rounded for reports; None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[index], 4)
+
+def render_prometheus():
+    """Returns every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+@contextmanager
+def start_trace():
+    """
+    Collects spans for the duration of the block and yields the span list.
+    Spans recorded by `timed` in this context (and contexts copied from it) are
+    appended to it. On exit the previous trace, if any, is current again, so a
+    reused thread never keeps adding to a finished request's trace.
+    """
+    trace = {"start": time.perf_counter(), "spans": []}
+    token = _current_trace.set(trace)
+    try:
+        yield trace["spans"]
+    finally:
+        _current_trace.reset(token)
+
+@contextmanager
+def timed(stage):
+    """Records how long the block takes in STAGE_SECONDS and in the current trace, if any."""
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        STAGE_FAILURES.labels(stage=stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["spans"].append({
+                "stage": stage,
+                "start": round(start - trace["start"], 4),
+                "seconds": round(elapsed, 4),
+                "failed": failed,
+                "thread": threading.current_thread().name,
+            })
+
+def instrumented(stage):
+    """Decorator form of `timed`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
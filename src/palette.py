@@ -0,0 +1,97 @@
+# src/palette.py
+
+import numpy as np
+from PIL import Image
+
+# Bump when the algorithm changes so cached palettes from older versions are not reused.
+PALETTE_VERSION = 1
+MAX_SAMPLE_SIDE = 160
+MIN_ALPHA = 0.1
+KMEANS_ITERATIONS = 12
+# Quantization step per Lab channel before clustering. Pixels in the same bin are clustered as one weighted point.
+LAB_BIN_SIZE = 4.0
+
+def _srgb_to_lab(rgb):
+    """Converts an (N, 3) array of sRGB values in [0, 1] to CIELAB (D65)."""
+    linear = np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+    xyz = linear @ np.array([
+        [0.4124564, 0.2126729, 0.0193339],
+        [0.3575761, 0.7151522, 0.1191920],
+        [0.1804375, 0.0721750, 0.9503041],
+    ])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1)
+
+def _load_pixels(image_path, max_side=MAX_SAMPLE_SIDE):
+    """Loads a downsampled image as (rgb, weight) arrays, weighting each pixel by its opacity."""
+    with Image.open(image_path) as img:
+        img.draft('RGB', (max_side * 2, max_side * 2))
+        img = img.convert('RGBA')
+        img.thumbnail((max_side, max_side), Image.Resampling.BOX)
+        pixels = np.asarray(img, dtype=np.float64).reshape(-1, 4) / 255.0
+    weights = pixels[:, 3]
+    visible = weights >= MIN_ALPHA
+    return pixels[visible, :3], weights[visible]
+
+def _init_centers(points, weights, k):
+    """Deterministic farthest-point seeding, starting from the heaviest point."""
+    centers = [points[np.argmax(weights)]]
+    distances = np.sum((points - centers[0]) ** 2, axis=1)
+    for _ in range(1, k):
+        # Favour points far from existing centers, tempered by how common they are in the image.
+        next_index = np.argmax(distances ** 2 * np.sqrt(weights))
+        if distances[next_index] == 0:
+            break
+        centers.append(points[next_index])
+        distances = np.minimum(distances, np.sum((points - centers[-1]) ** 2, axis=1))
+    return np.array(centers)
+
+def _weighted_kmeans(points, weights, k, iterations=KMEANS_ITERATIONS):
+    centers = _init_centers(points, weights, k)
+    for _ in range(iterations):
+        labels = np.argmin(((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+        totals = np.bincount(labels, weights=weights, minlength=len(centers))
+        new_centers = np.stack([
+            np.bincount(labels, weights=weights * points[:, channel], minlength=len(centers))
+            for channel in range(points.shape[1])
+        ], axis=1)
+        occupied = totals > 0
+        new_centers[occupied] /= totals[occupied, None]
+        new_centers[~occupied] = centers[~occupied]
+        if np.allclose(new_centers, centers):
+            break
+        centers = new_centers
+    return labels, totals
+
+def extract_palette(image_path, num_colors=6):
+    """
+    Extracts the dominant colors of an image as a list of (hex, proportion),
+    most common first. Clustering happens in CIELAB so that visually distinct
+    colors stay separate, and transparent pixels do not count. Output is
+    deterministic for a given image.
+    """
+    rgb, alpha = _load_pixels(image_path)
+    if len(rgb) == 0:
+        return []
+    lab = _srgb_to_lab(rgb)
+
+    # Collapse near-identical pixels into weighted bins so clustering runs on far fewer points.
+    bins = np.round(lab / LAB_BIN_SIZE).astype(np.int32)
+    _, bin_index = np.unique(bins, axis=0, return_inverse=True)
+    bin_index = bin_index.ravel()
+    bin_weights = np.bincount(bin_index, weights=alpha)
+    bin_lab = np.stack([np.bincount(bin_index, weights=alpha * lab[:, c]) for c in range(3)], axis=1) / bin_weights[:, None]
+    bin_rgb = np.stack([np.bincount(bin_index, weights=alpha * rgb[:, c]) for c in range(3)], axis=1) / bin_weights[:, None]
+
+    labels, totals = _weighted_kmeans(bin_lab, bin_weights, min(num_colors, len(bin_lab)))
+    total_weight = totals.sum()
+    palette = []
+    for cluster in np.argsort(-totals, kind='stable'):
+        if totals[cluster] <= 0:
+            continue
+        members = labels == cluster
+        mean_rgb = (bin_rgb[members] * bin_weights[members, None]).sum(axis=0) / totals[cluster]
+        r, g, b = np.clip(np.round(mean_rgb * 255), 0, 255).astype(int)
+        palette.append((f'#{r:02x}{g:02x}{b:02x}', float(totals[cluster] / total_weight)))
+    return palette
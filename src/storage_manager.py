@@ -0,0 +1,314 @@
+# src/storage_manager.py
+
+import os
+import time
+import threading
+from queue import Queue, Empty
+from contextlib import contextmanager
+from PIL import Image, features
+from src.metrics import STORAGE_BYTES, STORAGE_EVICTIONS
+
+STORAGE_QUOTA_BYTES = int(os.environ.get("STORAGE_QUOTA_BYTES", 2 * 1024 * 1024 * 1024))
+STORAGE_GC_INTERVAL = int(os.environ.get("STORAGE_GC_INTERVAL", 300))
+# Files younger than this are never evicted or compressed by a scan, so running jobs keep their files.
+STORAGE_GRACE_SECONDS = int(os.environ.get("STORAGE_GRACE_SECONDS", 3600))
+SCREENSHOT_WEBP_QUALITY = int(os.environ.get("SCREENSHOT_WEBP_QUALITY", 80))
+# Eviction stops once usage is back under this share of the quota, so it does not run on every pass.
+LOW_WATER_MARK = 0.9
+# Pause between domains and eviction batches so a pass never holds the disk (or the GIL) for long.
+STEP_PAUSE_SECONDS = 0.01
+EVICTION_BATCH = 50
+
+WEBP_AVAILABLE = features.check('webp')
+SCREENSHOT_NAME = "screenshot.png"
+
+def compressed_path_for(path):
+    """Returns where the WebP copy of a screenshot lives, e.g. `screenshot.png` -> `screenshot.webp`."""
+    return os.path.splitext(path)[0] + ".webp"
+
+def resolve_artifact(path):
+    """
+    Returns the path an artifact can be read from now: the path itself, or its
+    WebP copy if the storage manager has compressed it. None if neither exists.
+    """
+    if not path:
+        return None
+    if os.path.exists(path):
+        return path
+    if os.path.basename(path) == SCREENSHOT_NAME and os.path.exists(compressed_path_for(path)):
+        return compressed_path_for(path)
+    return None
+
+class StorageManager:
+    """
+    Keeps the per-domain artifact directories (e.g. `assets/<domain>`,
+    `output/<domain>`) under a byte quota.
+
+    A background thread walks one domain directory at a time, recording the
+    size and last access of each file, and converts finished screenshots to
+    WebP. The last access is the later of the file's mtime and the time
+    `touch` last saw it served; mtimes are never rewritten, since thumbnails
+    use them to tell whether their source changed. When the total goes over
+    `quota_bytes`, the least recently used files that no history record refers
+    to are deleted until usage is back under the low-water mark.
+
+    Jobs wrap their work in `in_use(domain)`; files of a domain with a running
+    job are neither compressed nor evicted, and queued compressions wait for it.
+    """
+    def __init__(self, roots, history_manager=None, quota_bytes=STORAGE_QUOTA_BYTES,
+                 interval=STORAGE_GC_INTERVAL, grace_seconds=STORAGE_GRACE_SECONDS):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.history_manager = history_manager
+        self.quota_bytes = quota_bytes
+        self.interval = interval
+        self.grace_seconds = grace_seconds
+        self._domains = {}
+        self._accessed = {}
+        self._active = {}
+        self._deferred = set()
+        # Domains whose screenshot is being converted; a job on one of them waits for the conversion.
+        self._compressing = set()
+        self._jobs_lock = threading.Lock()
+        self._jobs_changed = threading.Condition(self._jobs_lock)
+        self._compress_queue = Queue()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Starts the background thread. Safe to call more than once."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="storage-manager")
+                self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def touch(self, path):
+        """Records that an artifact was used, so eviction treats it as recent."""
+        with self._lock:
+            self._accessed[os.path.abspath(path)] = time.time()
+
+    def _last_access(self, path, mtime):
+        return max(mtime, self._accessed.get(path, 0))
+
+    @contextmanager
+    def in_use(self, domain):
+        """Marks a domain's files as used by a running job until the block exits."""
+        with self._jobs_changed:
+            while domain in self._compressing:
+                self._jobs_changed.wait()
+            self._active[domain] = self._active.get(domain, 0) + 1
+        try:
+            yield
+        finally:
+            with self._jobs_lock:
+                self._active[domain] -= 1
+                if not self._active[domain]:
+                    del self._active[domain]
+            if self._deferred:
+                self._wake.set()
+
+    def schedule_compression(self, screenshot_path):
+        """Queues a screenshot whose analysis has finished to be converted to WebP in the background."""
+        if screenshot_path and WEBP_AVAILABLE:
+            self._compress_queue.put(os.path.abspath(screenshot_path))
+            self._wake.set()
+
+    def usage(self):
+        """Returns {domain: {"bytes", "files", "last_access"}} from the latest scan, summed over all roots."""
+        totals = {}
+        with self._lock:
+            for (_, domain), files in self._domains.items():
+                entry = totals.setdefault(domain, {"bytes": 0, "files": 0, "last_access": 0})
+                entry["bytes"] += sum(size for size, _ in files.values())
+                entry["files"] += len(files)
+                entry["last_access"] = max([entry["last_access"]] + [self._last_access(path, mtime)
+                                                                     for path, (_, mtime) in files.items()])
+        return totals
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(size for files in self._domains.values() for size, _ in files.values())
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Storage Manager: Pass failed. {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self):
+        """Runs one full pass: queued compressions, a scan of every domain, then eviction if over quota."""
+        self.compress_pending()
+        seen = set()
+        for root in self.roots:
+            try:
+                domains = [entry.name for entry in os.scandir(root) if entry.is_dir()]
+            except OSError:
+                continue
+            for domain in domains:
+                if self._stopped.is_set():
+                    return
+                seen.add((root, domain))
+                self._scan_domain(root, domain)
+                # Compressions queued by finishing jobs jump ahead of the rest of the scan.
+                self.compress_pending()
+                time.sleep(STEP_PAUSE_SECONDS)
+        with self._lock:
+            for key in set(self._domains) - seen:
+                del self._domains[key]
+            # Forget access times of files that no longer exist.
+            present = {path for files in self._domains.values() for path in files}
+            self._accessed = {path: accessed for path, accessed in self._accessed.items() if path in present}
+        self._update_gauges()
+        if self.total_bytes() > self.quota_bytes:
+            self._evict()
+
+    def _scan_domain(self, root, domain):
+        files = {}
+        now = time.time()
+        for dirpath, _, filenames in os.walk(os.path.join(root, domain)):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    continue
+                if name == SCREENSHOT_NAME and WEBP_AVAILABLE and now - stat.st_mtime > self.grace_seconds:
+                    compressed = self._compress_if_idle(path)
+                    if compressed:
+                        path, stat = compressed, os.stat(compressed)
+                files[path] = (stat.st_size, stat.st_mtime)
+        if not files:
+            self._remove_stale_dir(os.path.join(root, domain))
+        with self._lock:
+            self._domains[(root, domain)] = files
+
+    def _remove_stale_dir(self, directory):
+        """Removes an empty domain directory, unless it was just created for a running job."""
+        try:
+            if time.time() - os.path.getmtime(directory) > self.grace_seconds:
+                os.rmdir(directory)
+        except OSError:
+            pass
+
+    def compress_pending(self):
+        """
+        Compresses every screenshot queued by `schedule_compression`. Those of
+        domains with a running job are kept for a later call.
+        """
+        with self._jobs_lock:
+            deferred, self._deferred = self._deferred, set()
+        for path in deferred:
+            self._compress_queue.put(path)
+        while True:
+            try:
+                path = self._compress_queue.get_nowait()
+            except Empty:
+                return
+            if self._compress_if_idle(path) is False:
+                with self._jobs_lock:
+                    self._deferred.add(path)
+
+    def _compress_if_idle(self, path):
+        """Compresses a screenshot unless a job is running on its domain, in which case False is returned."""
+        domain = os.path.basename(os.path.dirname(path))
+        with self._jobs_lock:
+            if domain in self._active or domain in self._compressing:
+                return False
+            self._compressing.add(domain)
+        # Encode outside the lock, so only jobs for this domain wait for the conversion.
+        try:
+            return self._compress(path)
+        finally:
+            with self._jobs_changed:
+                self._compressing.discard(domain)
+                self._jobs_changed.notify_all()
+
+    def _compress(self, path):
+        """Converts a PNG screenshot to WebP and removes the PNG. Returns the WebP path, or None."""
+        webp_path = compressed_path_for(path)
+        tmp_path = f"{webp_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            before = os.stat(path)
+            with Image.open(path) as img:
+                img.convert('RGB').save(tmp_path, 'WEBP', quality=SCREENSHOT_WEBP_QUALITY, method=4)
+            # A new analysis may have replaced the PNG meanwhile; keep the newer file in that case.
+            if os.stat(path).st_mtime_ns != before.st_mtime_ns:
+                os.remove(tmp_path)
+                return None
+            os.replace(tmp_path, webp_path)
+            # Keep the original time so thumbnails stay fresh and eviction order is unchanged.
+            os.utime(webp_path, ns=(before.st_atime_ns, before.st_mtime_ns))
+            os.remove(path)
+            with self._lock:
+                if path in self._accessed:
+                    self._accessed[webp_path] = self._accessed.pop(path)
+            return webp_path
+        except FileNotFoundError:
+            return None  # Already compressed or replaced.
+        except (IOError, OSError) as e:
+            print(f"Storage Manager: Could not compress {path}. {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return None
+
+    def _referenced_paths(self):
+        """Absolute paths of every file a history record points to, including compressed screenshots."""
+        if not self.history_manager:
+            return set()
+        referenced = set()
+        for path in self.history_manager.referenced_paths():
+            path = os.path.abspath(path)
+            referenced.add(path)
+            referenced.add(compressed_path_for(path))
+        return referenced
+
+    def _evict(self):
+        referenced = self._referenced_paths()
+        cutoff = time.time() - self.grace_seconds
+        with self._jobs_lock:
+            active = set(self._active)
+        with self._lock:
+            candidates = sorted((self._last_access(path, mtime), size, path, key) for key, files in self._domains.items()
+                                for path, (size, mtime) in files.items()
+                                if self._last_access(path, mtime) < cutoff and path not in referenced
+                                and key[1] not in active)
+        target = self.quota_bytes * LOW_WATER_MARK
+        total = self.total_bytes()
+        for i, (_, size, path, key) in enumerate(candidates):
+            if total <= target or self._stopped.is_set():
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Storage Manager: Could not remove {path}. {e}")
+                continue
+            total -= size
+            STORAGE_EVICTIONS.labels(root=os.path.basename(key[0])).inc()
+            with self._lock:
+                self._domains.get(key, {}).pop(path, None)
+            if (i + 1) % EVICTION_BATCH == 0:
+                time.sleep(STEP_PAUSE_SECONDS)
+        if total > self.quota_bytes:
+            print(f"Storage Manager: {total} bytes in use after eviction; the rest is referenced by history or too recent.")
+        self._update_gauges()
+
+    def _update_gauges(self):
+        with self._lock:
+            for root in self.roots:
+                STORAGE_BYTES.labels(root=os.path.basename(root)).set(
+                    sum(size for (files_root, _), files in self._domains.items() if files_root == root
+                        for size, _ in files.values()))
@@ -1,8 +1,21 @@
 # src/template_generator.py
 
+import io
 import os
+import math
+import hashlib
+import threading
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
 from PIL import Image, ImageDraw, ImageFont
 from reportlab.pdfgen import canvas as pdfcanvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.lib.colors import HexColor
+from reportlab.lib.utils import ImageReader
+from src.logo_cache import get_logo_cache
+from src.metrics import timed, instrumented
 
 try:
     from cairosvg import svg2png
@@ -10,83 +23,458 @@ try:
 except (ImportError, OSError):
     CAIROSVG_AVAILABLE = False
 
+try:
+    from svglib.svglib import svg2rlg
+    from reportlab.graphics import renderPDF
+    SVGLIB_AVAILABLE = True
+except ImportError:
+    SVGLIB_AVAILABLE = False
+
+TEMPLATES = ('mug', 'card', 'tshirt')
+# Bump when the layouts, rasterizer or PDF output change. Output files are named by a hash that
+# includes it and served as immutable, so old names must not be reused for the new output.
+RENDER_VERSION = 2
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 2))
+# Upper bound on one render in the process pool, so a stuck worker fails its variant instead of the request.
+RENDER_TIMEOUT = int(os.environ.get("RENDER_TIMEOUT", 120))
+# The largest logo box used by any template; batch renders decode the logo once at this size.
+MAX_LOGO_SIZE = (400, 400)
+# Physical print width of each template in inches; PDFs scale the design's pixels to fit it.
+PRINT_WIDTHS = {
+    "mug": 8.5,      # The printable wrap of an 11 oz mug.
+    "card": 3.5,     # A standard 3.5 x 2 in business card.
+    "tshirt": 12.0,  # A full-front DTG print area.
+}
+# Raster logos are embedded in PDFs at this resolution for their placed size, or at the source's if lower.
+PRINT_DPI = 300
+# Font roles used by the layouts: (TrueType file for previews, built-in PDF font, size in pixels).
+FONTS = {
+    "bold": ("arialbd.ttf", "Helvetica-Bold", 24),
+    "regular": ("arial.ttf", "Helvetica", 18),
+    "slogan": ("arialbd.ttf", "Helvetica-Bold", 48),
+}
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # Workers are spawned rather than forked: the server has other threads running, and a
+            # lock one of them held at fork time (metrics, logo cache) would never be released in the child.
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _render_pool
+
+def _discard_render_pool(pool):
+    """
+    Drops a broken or stuck pool so the next batch starts a fresh one. Its
+    workers are stopped first, since shutdown() alone leaves a hung worker running.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _render_variant(output_dir, domain_name, template, logo_img, primary_color, options):
+    """Process pool entry point: renders one template/color variant from an already decoded logo."""
+    generator = TemplateGenerator(output_dir, domain_name)
+    return generator.render_variant(template, logo_img, primary_color, **options)
+
+class Design:
+    """
+    A template layout as a list of drawing operations in pixel coordinates
+    (origin top left). A design is drawn once per output format: rasterized
+    for the PNG preview, and emitted as vector shapes and text for the PDF,
+    where it is scaled to `print_width` inches (the height keeps the aspect ratio).
+    """
+    def __init__(self, width, height, background, print_width):
+        self.width = width
+        self.height = height
+        self.background = background
+        self.print_width = print_width
+        self.ops = []
+
+    @property
+    def points_per_pixel(self):
+        return self.print_width * 72 / self.width
+
+    def digest(self, logo_img):
+        """
+        A short hash of everything both outputs are drawn from: the renderer
+        version, the layout, its operations and the logo's source file. Used to
+        name the output files.
+        """
+        logo_hash = logo_img.info.get("logo_source_hash", "")
+        key = repr((RENDER_VERSION, self.width, self.height, self.background, self.print_width, self.ops, logo_hash))
+        return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    def rect(self, x0, y0, x1, y1, fill):
+        self.ops.append(("rect", x0, y0, x1, y1, fill))
+
+    def line(self, x0, y0, x1, y1, fill, width=1):
+        self.ops.append(("line", x0, y0, x1, y1, fill, width))
+
+    def logo(self, center_x, center_y, max_size):
+        """Places the logo, scaled down to fit `max_size`, centered on a point."""
+        self.ops.append(("logo", center_x, center_y, max_size))
+
+    def text(self, x, y, text, font, fill, align="left"):
+        """Draws text whose top left (or top center, with align="center") is at (x, y)."""
+        self.ops.append(("text", x, y, text, font, fill, align))
+
+@functools.lru_cache(maxsize=32)
+def _load_svg_drawing(svg_path, mtime_ns):
+    """Parses an SVG logo into a reportlab drawing. Cached per file version; drawings are never modified."""
+    return svg2rlg(svg_path)
+
+def _logo_box(center_x, center_y, size):
+    width, height = size
+    return center_x - width // 2, center_y - height // 2, width, height
+
+def _contrasting_text_color(hex_color):
+    """Black or white, whichever reads better on the given background."""
+    r, g, b = (int(hex_color.lstrip('#')[i:i + 2], 16) for i in (0, 2, 4))
+    return "#111111" if (0.299 * r + 0.587 * g + 0.114 * b) > 150 else "#FFFFFF"
+
 class TemplateGenerator:
     """Creates merchandise designs (PNGs and PDFs) based on brand assets."""
     def __init__(self, output_dir, domain_name):
         self.output_dir = output_dir
         self.domain_name = domain_name
         os.makedirs(self.output_dir, exist_ok=True)
-        try:
-            self.font_bold = ImageFont.truetype("arialbd.ttf", 24)
-            self.font_regular = ImageFont.truetype("arial.ttf", 18)
-        except IOError:
-            self.font_bold = ImageFont.load_default()
-            self.font_regular = ImageFont.load_default()
-
-    def _prepare_logo(self, logo_path, max_size=(400, 400)):
-        """Converts SVG logos to PNG and resizes all logos."""
-        if logo_path.lower().endswith('.svg'):
-            if CAIROSVG_AVAILABLE:
-                prepared_logo_path = os.path.join(os.path.dirname(logo_path), "logo_converted.png")
-                svg2png(url=logo_path, write_to=prepared_logo_path, output_width=max_size[0], output_height=max_size[1])
-                logo_path = prepared_logo_path
+        self.fonts = {}
+        for role, (font_file, _, size) in FONTS.items():
+            try:
+                self.fonts[role] = ImageFont.truetype(font_file, size)
+            except IOError:
+                self.fonts[role] = ImageFont.load_default()
+
+    @instrumented("template.prepare_logo")
+    def _prepare_logo(self, logo_path, max_size=MAX_LOGO_SIZE):
+        """
+        Converts SVG logos to PNG and decodes all logos into RGBA images no larger than `max_size`.
+        Prepared logos are cached by content hash and size, so repeat calls do no decoding or resampling.
+        """
+        if not logo_path:
+            return Image.new('RGBA', (1, 1), (0,0,0,0))
+        is_svg = logo_path.lower().endswith('.svg')
+        if is_svg and not CAIROSVG_AVAILABLE:
+            print("WARNING: SVG logo found but CairoSVG is not installed. Skipping logo in previews.")
+            logo_img = Image.new('RGBA', (1, 1), (0,0,0,0)) # Return tiny transparent image
+            logo_img.info["logo_svg_path"] = logo_path
+            logo_img.info["logo_source_hash"] = get_logo_cache().source_hash(logo_path)
+            return logo_img
+        logo_cache = get_logo_cache()
+        source_hash = logo_cache.source_hash(logo_path)
+        key = logo_cache.make_key(source_hash, max_size)
+        logo_img = logo_cache.get(key)
+        if logo_img is None:
+            if logo_path.lower().endswith('.svg'):
+                png_bytes = svg2png(url=logo_path, output_width=max_size[0], output_height=max_size[1])
+                logo_img = Image.open(io.BytesIO(png_bytes)).convert("RGBA")
             else:
-                print("WARNING: SVG logo found but CairoSVG is not installed. Skipping logo.")
-                return Image.new('RGBA', (1, 1), (0,0,0,0)) # Return tiny transparent image
-        logo_img = Image.open(logo_path).convert("RGBA")
-        logo_img.thumbnail(max_size, Image.Resampling.LANCZOS)
+                logo_img = Image.open(logo_path).convert("RGBA")
+            logo_img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            logo_cache.put(key, logo_img)
+        # Remember where the image came from so smaller fitted versions can be cached too,
+        # and so PDFs can draw SVG logos as vectors.
+        logo_img.info["logo_source_hash"] = source_hash
+        if is_svg:
+            logo_img.info["logo_svg_path"] = logo_path
+        else:
+            logo_img.info["logo_path"] = logo_path
         return logo_img
 
+    def _fit_logo(self, logo_img, max_size):
+        """Returns a decoded logo shrunk to fit `max_size`. The result is shared and must not be modified."""
+        if logo_img.width <= max_size[0] and logo_img.height <= max_size[1]:
+            return logo_img
+        source_hash = logo_img.info.get("logo_source_hash")
+        if not source_hash:
+            fitted = logo_img.copy()
+            fitted.thumbnail(max_size, Image.Resampling.LANCZOS)
+            return fitted
+        logo_cache = get_logo_cache()
+        key = logo_cache.make_key(source_hash, max_size) + "_fit"
+        fitted = logo_cache.get(key)
+        if fitted is None:
+            fitted = logo_img.copy()
+            fitted.thumbnail(max_size, Image.Resampling.LANCZOS)
+            logo_cache.put(key, fitted)
+        return fitted
+
+    def _layout_mug(self, primary_color):
+        design = Design(900, 400, primary_color, PRINT_WIDTHS["mug"])
+        design.logo(450, 200, (300, 300))
+        return design
+
+    def _layout_business_card(self, primary_color, accent_color, user_name=None, user_title=None):
+        W, H = 1050, 600
+        design = Design(W, H, "#FFFFFF", PRINT_WIDTHS["card"])
+        design.rect(0, 0, W // 3, H, primary_color)
+        design.logo(W // 6, H // 4, (250, 250))
+        text_x, text_color = (W // 3) + 50, "#333333"
+        design.text(text_x, 150, user_name or "Your Name", "bold", text_color)
+        design.text(text_x, 190, user_title or "Job Title / Position", "regular", accent_color)
+        design.line(text_x, 250, W - 50, 250, "#EEEEEE", width=2)
+        design.text(text_x, 280, "(123) 456-7890", "regular", text_color)
+        design.text(text_x, 320, f"hello@{self.domain_name}", "regular", text_color)
+        design.text(text_x, 360, self.domain_name, "regular", text_color)
+        return design
+
+    def _layout_tshirt(self, primary_color, slogan_text=None):
+        W, H = 1000, 1200
+        design = Design(W, H, primary_color, PRINT_WIDTHS["tshirt"])
+        design.logo(W // 2, 300 + MAX_LOGO_SIZE[1] // 2, MAX_LOGO_SIZE)
+        if slogan_text:
+            design.text(W // 2, 780, slogan_text, "slogan", _contrasting_text_color(primary_color), align="center")
+        return design
+
+    def _rasterize(self, design, logo_img):
+        """Draws a design into an RGB image for the PNG preview."""
+        canvas = Image.new('RGB', (design.width, design.height), color=design.background)
+        draw = ImageDraw.Draw(canvas)
+        for op in design.ops:
+            kind = op[0]
+            if kind == "rect":
+                _, x0, y0, x1, y1, fill = op
+                draw.rectangle([(x0, y0), (x1, y1)], fill=fill)
+            elif kind == "line":
+                _, x0, y0, x1, y1, fill, width = op
+                draw.line([(x0, y0), (x1, y1)], fill=fill, width=width)
+            elif kind == "logo":
+                _, center_x, center_y, max_size = op
+                fitted = self._fit_logo(logo_img, max_size)
+                x, y, _, _ = _logo_box(center_x, center_y, fitted.size)
+                canvas.paste(fitted, (x, y), fitted)
+            elif kind == "text":
+                _, x, y, text, font, fill, align = op
+                if align == "center":
+                    x -= draw.textlength(text, font=self.fonts[font]) // 2
+                draw.text((x, y), text, font=self.fonts[font], fill=fill)
+        return canvas
+
+    def _draw_vector_logo(self, c, logo_img, op, to_pdf, scale):
+        _, center_x, center_y, max_size = op
+        svg_path = logo_img.info.get("logo_svg_path")
+        drawing = None
+        if svg_path and SVGLIB_AVAILABLE:
+            try:
+                drawing = _load_svg_drawing(svg_path, os.stat(svg_path).st_mtime_ns)
+            except Exception as e:
+                print(f"Could not read SVG logo {svg_path} for the PDF, using the raster logo. {e}")
+        if drawing and drawing.width and drawing.height:
+            fit = min(max_size[0] / drawing.width, max_size[1] / drawing.height)
+            x, y, width, height = _logo_box(center_x, center_y, (drawing.width * fit, drawing.height * fit))
+            c.saveState()
+            c.translate(*to_pdf(x, y + height))
+            # Drawings are in points; also scale them from design pixels to the page.
+            c.scale(fit * scale, fit * scale)
+            renderPDF.draw(drawing, c, 0, 0)
+            c.restoreState()
+            return
+        fitted = self._fit_logo(logo_img, max_size)
+        if fitted.width <= 1 and fitted.height <= 1:
+            return
+        x, y, width, height = _logo_box(center_x, center_y, fitted.size)
+        px, py = to_pdf(x, y + height)
+        c.drawImage(ImageReader(self._print_logo(logo_img, fitted, scale)), px, py,
+                    width=width * scale, height=height * scale, mask='auto')
+
+    def _print_logo(self, logo_img, fitted, scale):
+        """Returns the logo decoded for the PDF at PRINT_DPI over its placed size, capped at the source's resolution."""
+        logo_path = logo_img.info.get("logo_path")
+        target = tuple(math.ceil(side * scale / 72 * PRINT_DPI) for side in fitted.size)
+        if not logo_path or (target[0] <= fitted.width and target[1] <= fitted.height):
+            return fitted
+        try:
+            return self._prepare_logo(logo_path, max_size=target)
+        except (IOError, OSError) as e:
+            print(f"Could not read logo {logo_path} for the PDF, using the preview logo. {e}")
+            return fitted
+
+    @instrumented("template.encode_png")
+    def _encode_png(self, canvas):
+        buffer = io.BytesIO()
+        canvas.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def _write_file(self, path, data):
+        """Writes a file atomically so readers never see a partial file."""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _save_design(self, canvas, design, logo_img, template):
+        """
+        Saves a design under content-hashed names, e.g. `mug_design_<hash>.png`.
+        The hash covers the design and the logo source rather than the PNG, since
+        the PDF can differ where the preview does not (an SVG logo without
+        CairoSVG). Identical designs map to the same files, so they are only
+        written once, and concurrent renders never overwrite each other.
+        """
+        digest = design.digest(logo_img)
+        output_path = os.path.join(self.output_dir, f"{template}_design_{digest}.png")
+        pdf_path = os.path.join(self.output_dir, f"{template}_print_ready_{digest}.pdf")
+        if not os.path.exists(output_path):
+            self._write_file(output_path, self._encode_png(canvas))
+        if not os.path.exists(pdf_path):
+            pdf_path = self._create_pdf_output(design, logo_img, pdf_path)
+        return {"design_path": output_path, "pdf_path": pdf_path}
+
+    def render_variant(self, template, logo_img, primary_color, accent_color="#333333",
+                       user_name=None, user_title=None, slogan_text=None, in_memory=False):
+        """
+        Draws one template from an already decoded logo and saves it.
+        With `in_memory=True` nothing is written; {"png": bytes, "pdf": bytes} is returned instead.
+        """
+        if template not in TEMPLATES:
+            raise ValueError(f"Unknown template: {template}")
+        with timed(f"template.draw_{template}"):
+            if template == 'mug':
+                design = self._layout_mug(primary_color)
+            elif template == 'card':
+                design = self._layout_business_card(primary_color, accent_color, user_name, user_title)
+            else:
+                design = self._layout_tshirt(primary_color, slogan_text)
+            canvas = self._rasterize(design, logo_img)
+        if in_memory:
+            return {"png": self._encode_png(canvas), "pdf": self._encode_pdf(design, logo_img)}
+        return self._save_design(canvas, design, logo_img, template)
+
     def create_mug_template(self, logo_path, primary_color):
         """Generates a coffee mug design."""
         try:
-            canvas = Image.new('RGB', (900, 400), color=primary_color)
-            logo_img = self._prepare_logo(logo_path, max_size=(300, 300))
-            logo_x = (canvas.width - logo_img.width) // 2
-            logo_y = (canvas.height - logo_img.height) // 2
-            canvas.paste(logo_img, (logo_x, logo_y), logo_img)
-            output_path = os.path.join(self.output_dir, "mug_design.png")
-            canvas.save(output_path)
-            pdf_path = self._create_pdf_output(output_path, "mug_print_ready.pdf")
-            return {"design_path": output_path, "pdf_path": pdf_path}
+            return self.render_variant('mug', self._prepare_logo(logo_path), primary_color)
         except Exception as e:
             print(f"Error creating mug template: {e}")
             return None
 
-    def create_business_card_template(self, logo_path, primary_color, accent_color):
+    def create_business_card_template(self, logo_path, primary_color, accent_color, user_name=None, user_title=None):
         """Generates a business card design."""
         try:
-            W, H = 1050, 600
-            canvas = Image.new('RGB', (W, H), color="#FFFFFF")
-            draw = ImageDraw.Draw(canvas)
-            draw.rectangle([(0, 0), (W // 3, H)], fill=primary_color)
-            logo_img = self._prepare_logo(logo_path, max_size=(250, 250))
-            logo_x, logo_y = ((W // 3) - logo_img.width) // 2, (H // 4) - (logo_img.height // 2)
-            canvas.paste(logo_img, (logo_x, logo_y), logo_img)
-            text_x, text_color = (W // 3) + 50, "#333333"
-            draw.text((text_x, 150), "Your Name", font=self.font_bold, fill=text_color)
-            draw.text((text_x, 190), "Job Title / Position", font=self.font_regular, fill=accent_color)
-            draw.line([(text_x, 250), (W - 50, 250)], fill="#EEEEEE", width=2)
-            draw.text((text_x, 280), "(123) 456-7890", font=self.font_regular, fill=text_color)
-            draw.text((text_x, 320), f"hello@{self.domain_name}", font=self.font_regular, fill=text_color)
-            draw.text((text_x, 360), self.domain_name, font=self.font_regular, fill=text_color)
-            output_path = os.path.join(self.output_dir, "card_design.png")
-            canvas.save(output_path)
-            pdf_path = self._create_pdf_output(output_path, "card_print_ready.pdf")
-            return {"design_path": output_path, "pdf_path": pdf_path}
+            return self.render_variant('card', self._prepare_logo(logo_path), primary_color, accent_color,
+                                       user_name=user_name, user_title=user_title)
         except Exception as e:
             print(f"Error creating business card template: {e}")
             return None
 
-    def _create_pdf_output(self, image_path, pdf_filename):
-        """Converts a generated PNG design into a PDF."""
+    def create_tshirt_template(self, logo_path, primary_color, slogan_text=None):
+        """Generates a t-shirt design."""
         try:
-            pdf_path = os.path.join(self.output_dir, pdf_filename)
-            img = Image.open(image_path)
-            c = pdfcanvas.Canvas(pdf_path, pagesize=img.size)
-            c.drawImage(image_path, 0, 0, width=img.width, height=img.height)
-            c.save()
+            return self.render_variant('tshirt', self._prepare_logo(logo_path), primary_color, slogan_text=slogan_text)
+        except Exception as e:
+            print(f"Error creating t-shirt template: {e}")
+            return None
+
+    @instrumented("template.render_batch")
+    def render_batch(self, logo_path, colors, templates=TEMPLATES, accent_color="#333333",
+                     user_name=None, user_title=None, slogan_text=None, parallel=True):
+        """
+        Renders every template in every color in one call. The logo is decoded
+        once and shared with all renders, which run across a process pool.
+        Returns {template: {color: result}}, where a failed render's result is None.
+        """
+        logo_img = self._prepare_logo(logo_path)
+        options = {"accent_color": accent_color, "user_name": user_name,
+                   "user_title": user_title, "slogan_text": slogan_text}
+        variants = [(template, color) for template in templates for color in colors]
+        results = {template: {} for template in templates}
+
+        if parallel and len(variants) > 1:
+            pool = _get_render_pool()
+            try:
+                futures = [pool.submit(_render_variant, self.output_dir, self.domain_name, template, logo_img, color, options)
+                           for template, color in variants]
+            except BrokenProcessPool:
+                _discard_render_pool(pool)
+                futures = [None] * len(variants)
+            for future, (template, color) in zip(futures, variants):
+                try:
+                    if future is None:
+                        raise BrokenProcessPool("The render pool could not take the batch.")
+                    results[template][color] = future.result(timeout=RENDER_TIMEOUT)
+                except (BrokenProcessPool, CancelledError) as e:
+                    # A worker died (e.g. killed for memory); render here and let the next batch get a fresh pool.
+                    print(f"Render pool failed ({e or 'cancelled'}). Rendering {template} in {color} in-process.")
+                    _discard_render_pool(pool)
+                    results[template][color] = self._render_or_none(template, logo_img, color, options)
+                except FutureTimeoutError:
+                    print(f"Rendering {template} in {color} took over {RENDER_TIMEOUT}s. Restarting the render pool.")
+                    _discard_render_pool(pool)
+                    results[template][color] = None
+                except Exception as e:
+                    print(f"Error rendering {template} in {color}: {e}")
+                    results[template][color] = None
+        else:
+            for template, color in variants:
+                results[template][color] = self._render_or_none(template, logo_img, color, options)
+        return results
+
+    def _render_or_none(self, template, logo_img, color, options):
+        try:
+            return self.render_variant(template, logo_img, color, **options)
+        except Exception as e:
+            print(f"Error rendering {template} in {color}: {e}")
+            return None
+
+    @instrumented("template.encode_pdf")
+    def _encode_pdf(self, design, logo_img):
+        """
+        Draws a design as a vector PDF at its print size (`design.print_width` inches wide).
+        Shapes and text stay vector, SVG logos too when svglib is installed;
+        other logos are embedded at the resolution they are placed at.
+        """
+        scale = design.points_per_pixel
+        page_height = design.height * scale
+
+        def to_pdf(x, y):
+            return x * scale, page_height - y * scale
+
+        buffer = io.BytesIO()
+        c = pdfcanvas.Canvas(buffer, pagesize=(design.width * scale, page_height), invariant=1)
+        c.setFillColor(HexColor(design.background))
+        c.rect(0, 0, design.width * scale, page_height, stroke=0, fill=1)
+        for op in design.ops:
+            kind = op[0]
+            if kind == "rect":
+                _, x0, y0, x1, y1, fill = op
+                # PIL rectangles include their last row and column.
+                px, py = to_pdf(x0, y1 + 1)
+                c.setFillColor(HexColor(fill))
+                c.rect(px, py, (x1 + 1 - x0) * scale, (y1 + 1 - y0) * scale, stroke=0, fill=1)
+            elif kind == "line":
+                _, x0, y0, x1, y1, fill, width = op
+                c.setStrokeColor(HexColor(fill))
+                c.setLineWidth(width * scale)
+                c.line(*to_pdf(x0, y0), *to_pdf(x1, y1))
+            elif kind == "logo":
+                self._draw_vector_logo(c, logo_img, op, to_pdf, scale)
+            elif kind == "text":
+                _, x, y, text, font, fill, align = op
+                _, pdf_font, size = FONTS[font]
+                # Layouts give the top of the text; PDF text is placed by its baseline.
+                px, py = to_pdf(x, y + pdfmetrics.getAscent(pdf_font, size))
+                c.setFillColor(HexColor(fill))
+                c.setFont(pdf_font, size * scale)
+                if align == "center":
+                    c.drawCentredString(px, py, text)
+                else:
+                    c.drawString(px, py, text)
+        c.showPage()
+        c.save()
+        return buffer.getvalue()
+
+    def _create_pdf_output(self, design, logo_img, pdf_path):
+        """Writes a design as a print-ready vector PDF file."""
+        try:
+            self._write_file(pdf_path, self._encode_pdf(design, logo_img))
             return pdf_path
         except Exception as e:
-            print(f"Error creating PDF from {image_path}: {e}")
-            return None
\ No newline at end of file
+            print(f"Error creating PDF {pdf_path}: {e}")
+            return None
@@ -0,0 +1,37 @@
+# src/thumbnails.py
+
+import os
+import threading
+from PIL import Image
+from src.storage_manager import resolve_artifact
+
+THUMBNAIL_SIZE = (400, 225)
+
+def thumbnail_path_for(image_path):
+    """Returns where the thumbnail of an image lives, e.g. `screenshot.png` -> `screenshot_thumb.jpg`."""
+    base, _ = os.path.splitext(image_path)
+    return f"{base}_thumb.jpg"
+
+def make_thumbnail(image_path, size=THUMBNAIL_SIZE):
+    """
+    Creates (or refreshes) a small JPEG thumbnail next to the source image.
+    Returns the thumbnail path, or None if the source image is missing or unreadable.
+    """
+    thumb_path = thumbnail_path_for(image_path) if image_path else None
+    image_path = resolve_artifact(image_path)
+    if not image_path:
+        return None
+    try:
+        if os.path.exists(thumb_path) and os.path.getmtime(thumb_path) >= os.path.getmtime(image_path):
+            return thumb_path
+        with Image.open(image_path) as img:
+            img.draft('RGB', (size[0] * 2, size[1] * 2))
+            img = img.convert('RGB')
+            img.thumbnail(size, Image.Resampling.LANCZOS)
+            tmp_path = f"{thumb_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            img.save(tmp_path, 'JPEG', quality=80, optimize=True)
+            os.replace(tmp_path, thumb_path)
+        return thumb_path
+    except (IOError, OSError) as e:
+        print(f"Could not create thumbnail for {image_path}: {e}")
+        return None
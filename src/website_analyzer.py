@@ -1,45 +1,122 @@
 # src/website_analyzer.py
 
 import os
+import re
+import hashlib
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse, unquote
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from PIL import Image
-import colorgram
+from urllib.parse import urlparse
+from src.browser_pool import get_browser_pool
+from src.http_client import get_http_session
+from src.palette import extract_palette
+from src.logo_discovery import discover_logo
+from src.metrics import instrumented
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+HTML_TIMEOUT = int(os.environ.get("HTML_TIMEOUT", 20))
+HTML_MAX_BYTES = int(os.environ.get("HTML_MAX_BYTES", 5 * 1024 * 1024))
+
+# Logo candidates live in <head> and the page header, so HTML after these markers is never parsed.
+_HEAD_END = re.compile(rb'</head\s*>', re.I)
+_HEADER_END = re.compile(rb'</header\s*>', re.I)
+_LOGO_IMG = re.compile(rb'<img\b[^>]*logo[^>]*>', re.I)
+# Rescan a little of the previous chunk so markers split across chunks are still found.
+_SCAN_OVERLAP = 1024
+
+def normalize_url(url):
+    """Returns a canonical form of a URL: https by default, lowercase host, no fragment or trailing slash."""
+    url = url.strip()
+    if not url.startswith('http://') and not url.startswith('https://'):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    path = parsed.path.rstrip('/')
+    query = f"?{parsed.query}" if parsed.query else ''
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}{path}{query}"
+
+def domain_of(url):
+    """Returns the host whose `assets/<domain>` directory an analysis of the URL writes to."""
+    if not url.startswith('http://') and not url.startswith('https://'):
+        url = 'https://' + url
+    return urlparse(url).netloc
+
+def read_html_prefix(response, max_bytes=HTML_MAX_BYTES, chunk_size=64 * 1024):
+    """
+    Reads a streamed HTML response and returns (prefix, content_hash).
+    Bytes are kept only until `</head>` and then a closing `</header>` or a
+    logo-like `<img>` have been seen; the rest of the page is hashed but not
+    kept, so the content hash still changes when any part of the page does.
+    At most `max_bytes` are read; longer pages are truncated.
+    """
+    hasher = hashlib.sha256()
+    prefix = bytearray()
+    total, head_done, complete = 0, False, False
+    for chunk in response.iter_content(chunk_size):
+        chunk = chunk[:max_bytes - total]
+        total += len(chunk)
+        hasher.update(chunk)
+        if not complete:
+            start = max(0, len(prefix) - _SCAN_OVERLAP)
+            prefix += chunk
+            if not head_done:
+                match = _HEAD_END.search(prefix, start)
+                if match:
+                    head_done, start = True, match.end()
+            if head_done:
+                complete = bool(_HEADER_END.search(prefix, start) or _LOGO_IMG.search(prefix, start))
+        if total >= max_bytes:
+            break
+    return bytes(prefix), hasher.hexdigest()
 
 class WebsiteAnalyzer:
     """Handles all website scraping and asset extraction."""
-    def __init__(self, url):
+    def __init__(self, url, browser_pool=None):
         if not url.startswith('http://') and not url.startswith('https://'):
             self.url = 'https://' + url
         else:
             self.url = url
         self.soup = None
-        self.domain = urlparse(self.url).netloc
+        self.content_hash = None
+        self.browser_pool = browser_pool or get_browser_pool()
+        self.domain = domain_of(self.url)
         self.assets_dir = os.path.join('assets', self.domain)
         os.makedirs(self.assets_dir, exist_ok=True)
 
+    @instrumented("website.fetch_and_parse_html")
     def fetch_and_parse_html(self):
-        # ... (This method remains the same) ...
+        """
+        Streams the page over the shared HTTP session and parses only its head and header,
+        which is all the logo lookup needs. Uses lxml when it is installed.
+        """
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(self.url, headers=headers, timeout=20)
-            response.raise_for_status()
-            self.soup = BeautifulSoup(response.text, 'html.parser')
+            with get_http_session().get(self.url, stream=True, timeout=HTML_TIMEOUT) as response:
+                response.raise_for_status()
+                html, self.content_hash = read_html_prefix(response)
+                # Without a declared charset, let BeautifulSoup detect it from <meta> tags.
+                has_charset = 'charset' in response.headers.get('Content-Type', '').lower()
+                encoding = response.encoding if has_charset else None
+            self.soup = BeautifulSoup(html, HTML_PARSER, from_encoding=encoding)
             return True
         except requests.exceptions.RequestException as e:
             print(f"Error fetching URL {self.url}: {e}")
             return False
 
-    def get_logo(self):
+    @instrumented("website.get_logo_candidates")
+    def get_logo_candidates(self, max_candidates=12):
         """
-        Finds and downloads the most likely logo from the website.
+        Collects (src, filename_prefix) pairs for likely logos, best first.
         ENHANCED: Includes more selectors and a fallback to find favicons.
         """
-        if not self.soup: return None
+        if not self.soup: return []
+        candidates = []
+
+        def add(src, filename_prefix):
+            if src and not src.startswith('data:') and (src, filename_prefix) not in candidates:
+                candidates.append((src, filename_prefix))
 
         # --- 1. Attempt to find the main logo ---
         
@@ -51,10 +128,8 @@ class WebsiteAnalyzer:
         ]
 
         for selector in logo_selectors:
-            logo_img = self.soup.select_one(selector)
-            if logo_img and logo_img.get('src'):
-                logo_path = self._download_image(logo_img['src'], "logo")
-                if logo_path: return logo_path # Return the first one we successfully download
+            for logo_img in self.soup.select(selector, limit=2):
+                add(logo_img.get('src'), "logo")
         
         # --- 2. Fallback: Attempt to find a high-quality favicon ---
         
@@ -64,70 +139,41 @@ class WebsiteAnalyzer:
         ]
 
         for selector in favicon_selectors:
-            favicon_link = self.soup.select_one(selector)
-            if favicon_link and favicon_link.get('href'):
+            for favicon_link in self.soup.select(selector):
                 # Prioritize larger icons if size is specified
                 sizes = favicon_link.get('sizes')
                 if sizes and '180x180' not in sizes and '32x32' not in sizes:
                     continue # Skip low-res favicons if better ones might exist
-                
-                logo_path = self._download_image(favicon_link['href'], "favicon_logo")
-                if logo_path: return logo_path
+                add(favicon_link.get('href'), "favicon_logo")
 
-        return None # Return None if nothing is found
+        return candidates[:max_candidates]
 
-    def _download_image(self, src, filename_prefix):
-        """Helper function to download an image from a source URL."""
-        try:
-            # Construct absolute URL and handle URL decoding
-            image_url = urljoin(self.url, unquote(src))
-            
-            logo_response = requests.get(image_url, stream=True, timeout=10)
-            logo_response.raise_for_status()
-
-            # Determine a valid file extension
-            file_extension = os.path.splitext(urlparse(image_url).path)[1].lower() or '.png'
-            if file_extension not in ['.png', '.jpg', '.jpeg', '.svg', '.gif', '.ico']: file_extension = '.png'
-            
-            image_path = os.path.join(self.assets_dir, f"{filename_prefix}{file_extension}")
-            
-            with open(image_path, 'wb') as f:
-                for chunk in logo_response.iter_content(1024): f.write(chunk)
-            
-            # Verify the image is valid (but skip for SVGs)
-            if file_extension != '.svg': Image.open(image_path).verify()
-            
-            print(f"Successfully downloaded asset: {image_url}")
-            return image_path
-        except Exception as e:
-            print(f"Could not download image from {src}: {e}")
-            return None
+    @instrumented("website.get_logo")
+    def get_logo(self, candidates=None):
+        """Fetches all logo candidates in parallel and saves the best scoring one."""
+        if candidates is None:
+            candidates = self.get_logo_candidates()
+        return discover_logo(self.url, candidates, self.assets_dir)
 
+    @instrumented("website.capture_screenshot")
     def capture_screenshot(self):
-        # ... (This method remains the same) ...
+        """Captures a screenshot using a warm driver leased from the browser pool."""
         screenshot_path = os.path.join(self.assets_dir, "screenshot.png")
-        options = webdriver.ChromeOptions()
-        options.add_argument("--headless")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--hide-scrollbars")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
         try:
-            driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=options)
-            driver.get(self.url)
-            driver.save_screenshot(screenshot_path)
-            driver.quit()
+            with self.browser_pool.lease() as driver:
+                driver.get(self.url)
+                driver.save_screenshot(screenshot_path)
             return screenshot_path
         except Exception as e:
             print(f"Error capturing screenshot: {e}")
             return None
 
+    @instrumented("website.get_brand_colors")
     def get_brand_colors(self, image_path, num_colors=6):
-        # ... (This method remains the same) ...
+        """Extracts the dominant colors of an image as hex strings, most common first."""
         if not os.path.exists(image_path) or image_path.endswith('.svg'): return []
         try:
-            colors = colorgram.extract(image_path, num_colors)
-            return [f'#{c.rgb.r:02x}{c.rgb.g:02x}{c.rgb.b:02x}' for c in colors if c.proportion > 0.02]
+            return [hex_color for hex_color, proportion in extract_palette(image_path, num_colors) if proportion > 0.02]
         except Exception as e:
             print(f"Could not extract colors from image {image_path}: {e}")
             return []
\ No newline at end of file
@@ -0,0 +1,101 @@
+// static/history_script.js
+
+/**
+ * Loads further pages of history from /api/history as the user scrolls
+ * to the bottom of the list, keeping the current filters.
+ */
+function initializeHistoryScroll() {
+    const container = document.getElementById('history-container');
+    const sentinel = document.getElementById('history-sentinel');
+    const loader = document.getElementById('history-loader');
+    let nextCursor = sentinel.dataset.nextCursor;
+    let loading = false;
+
+    function buildCard(item) {
+        const card = document.createElement('div');
+        card.className = 'history-card';
+
+        if (item.thumbnail_path) {
+            const thumbnail = document.createElement('img');
+            thumbnail.src = '/' + item.thumbnail_path;
+            thumbnail.alt = `Screenshot of ${item.domain}`;
+            thumbnail.className = 'history-thumbnail';
+            thumbnail.loading = 'lazy';
+            card.appendChild(thumbnail);
+        }
+
+        const header = document.createElement('div');
+        header.className = 'history-card-header';
+        const logo = document.createElement('img');
+        logo.src = item.logo_path || '';
+        logo.alt = `Logo for ${item.domain}`;
+        logo.className = 'history-logo';
+        logo.onerror = () => { logo.style.display = 'none'; };
+        const titles = document.createElement('div');
+        const domain = document.createElement('h4');
+        domain.className = 'history-domain';
+        domain.textContent = item.domain;
+        const timestamp = document.createElement('p');
+        timestamp.className = 'history-timestamp';
+        timestamp.textContent = item.display_timestamp;
+        titles.append(domain, timestamp);
+        header.append(logo, titles);
+
+        const body = document.createElement('div');
+        body.className = 'history-card-body';
+        const description = document.createElement('p');
+        description.className = 'ai-description';
+        description.textContent = item.ai_description;
+        const colors = document.createElement('div');
+        colors.className = 'history-colors';
+        item.colors.forEach(color => {
+            const colorBox = document.createElement('div');
+            colorBox.className = 'color-box-small';
+            colorBox.style.backgroundColor = color;
+            colorBox.title = color;
+            colors.appendChild(colorBox);
+        });
+        body.append(description, colors);
+
+        const footer = document.createElement('div');
+        footer.className = 'history-card-footer';
+        const link = document.createElement('a');
+        link.href = item.report_url;
+        link.className = 'history-button';
+        link.textContent = 'View Report';
+        footer.appendChild(link);
+
+        card.append(header, body, footer);
+        return card;
+    }
+
+    async function loadNextPage() {
+        if (loading || !nextCursor) return;
+        loading = true;
+        loader.style.display = 'block';
+        try {
+            const params = new URLSearchParams(window.location.search);
+            params.set('cursor', nextCursor);
+            const response = await fetch('/api/history?' + params.toString());
+            const page = await response.json();
+            if (!response.ok) throw new Error(page.error || 'Could not load more history.');
+            page.items.forEach(item => container.appendChild(buildCard(item)));
+            nextCursor = page.next_cursor;
+        } catch (error) {
+            console.error("Loading history failed:", error);
+            nextCursor = null;
+        } finally {
+            loader.style.display = 'none';
+            loading = false;
+        }
+        if (!nextCursor) observer.disconnect();
+    }
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+    }, { rootMargin: '400px' });
+
+    if (nextCursor) observer.observe(sentinel);
+}
+
+window.addEventListener('DOMContentLoaded', initializeHistoryScroll);
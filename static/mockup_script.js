@@ -26,7 +26,9 @@ function initializeMockupGenerator() {
     // --- B: Application State ---
     const state = {
         analysisData: null,
-        activeTemplate: 'mug'
+        activeTemplate: 'mug',
+        // Pre-rendered results, keyed by template then color.
+        renders: { mug: {}, card: {}, tshirt: {} }
     };
 
     // --- C: Core Functions ---
@@ -47,6 +49,66 @@ function initializeMockupGenerator() {
         elements.mockupOutput.style.display = 'none'; // Hide old mockup before generating new one
     }
 
+    function selectedColor() {
+        return elements.colorPalette.querySelector('.color-box.active')?.dataset.color;
+    }
+
+    function customText() {
+        return {
+            name: elements.customNameInput.value,
+            title: elements.customTitleInput.value,
+            slogan: elements.customSloganInput.value
+        };
+    }
+
+    /**
+     * Shows the pre-rendered mockup for the active template and color,
+     * falling back to rendering it on demand if it is not ready yet.
+     */
+    function showMockup() {
+        const cached = state.renders[state.activeTemplate][selectedColor()];
+        if (cached) {
+            updateMockupImage(cached);
+        } else {
+            generateMockup();
+        }
+    }
+
+    /**
+     * Renders every template in every palette color in one request,
+     * so switching between variants afterwards needs no server round-trip.
+     */
+    async function prerenderPalette() {
+        elements.loader.style.display = 'block';
+        try {
+            const response = await fetch('/regenerate_batch', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    logo_path: state.analysisData.base_analysis.logo_path,
+                    domain: state.analysisData.domain,
+                    colors: state.analysisData.base_analysis.colors,
+                    accent_color: state.analysisData.base_analysis.colors[1] || '#333333',
+                    custom_text: customText()
+                }),
+            });
+            const result = await response.json();
+            if (!response.ok || !result.success) {
+                throw new Error(result.error || 'Server failed to pre-render the mockups.');
+            }
+            Object.entries(result.data).forEach(([template, byColor]) => {
+                Object.entries(byColor).forEach(([color, render]) => {
+                    if (render) state.renders[template][color] = render;
+                });
+            });
+        } catch (error) {
+            console.error("Pre-rendering failed, mockups will be rendered on demand:", error);
+        } finally {
+            elements.loader.style.display = 'none';
+        }
+        showMockup();
+    }
+
     /**
      * The main function to generate a new mockup by calling the backend.
      */
@@ -55,8 +117,8 @@ function initializeMockupGenerator() {
         elements.loader.style.display = 'block';
         elements.mockupOutput.style.display = 'none';
 
-        const selectedColor = elements.colorPalette.querySelector('.color-box.active')?.dataset.color;
-        if (!selectedColor) {
+        const color = selectedColor();
+        if (!color) {
             alert("Error: No color selected!");
             elements.loader.style.display = 'none';
             return;
@@ -65,14 +127,10 @@ function initializeMockupGenerator() {
         const requestBody = {
             logo_path: state.analysisData.base_analysis.logo_path,
             domain: state.analysisData.domain,
-            new_color: selectedColor,
+            new_color: color,
             active_template: state.activeTemplate,
             accent_color: state.analysisData.base_analysis.colors[1] || '#333333',
-            custom_text: {
-                name: elements.customNameInput.value,
-                title: elements.customTitleInput.value,
-                slogan: elements.customSloganInput.value
-            }
+            custom_text: customText()
         };
 
         try {
@@ -85,6 +143,7 @@ function initializeMockupGenerator() {
             if (!response.ok || !result.success) {
                 throw new Error(result.error || 'Server failed to generate the image file.');
             }
+            state.renders[state.activeTemplate][color] = result.data;
             updateMockupImage(result.data);
         } catch (error) {
             console.error("Regeneration failed:", error);
@@ -98,14 +157,14 @@ function initializeMockupGenerator() {
      * Updates the DOM to display the newly generated mockup image.
      */
     function updateMockupImage(resultData) {
-        const timestamp = '?t=' + new Date().getTime();
+        // Rendered files are named by content hash, so no cache-busting is needed.
         let title = `Generated ${state.activeTemplate.charAt(0).toUpperCase() + state.activeTemplate.slice(1)} Design`;
         if (resultData && resultData.design_path) {
             elements.mockupOutput.innerHTML = `
-                <img src="${resultData.design_path + timestamp}" alt="${title}">
+                <img src="${resultData.design_path}" alt="${title}">
                 <div class="item-info">
                     <h5>${title}</h5>
-                    <a href="${resultData.pdf_path + timestamp}" download="${state.activeTemplate}_print_ready.pdf" class="download-button">
+                    <a href="${resultData.pdf_path}" download="${state.activeTemplate}_print_ready.pdf" class="download-button">
                         <i class="fa-solid fa-download"></i> Download PDF
                     </a>
                 </div>`;
@@ -142,22 +201,30 @@ function initializeMockupGenerator() {
     });
 
     // Step 3: Setup event listeners for all interactive elements
-    elements.regenerateButton.addEventListener('click', generateMockup);
+    elements.regenerateButton.addEventListener('click', () => {
+        // Custom text may have changed, so other colors of this template are stale now.
+        state.renders[state.activeTemplate] = {};
+        generateMockup();
+    });
     elements.tabsContainer.addEventListener('click', (e) => {
         const tab = e.target.closest('.tab-button');
-        if (tab) updateActiveTemplate(tab.dataset.template);
+        if (tab) {
+            updateActiveTemplate(tab.dataset.template);
+            showMockup();
+        }
     });
     elements.colorPalette.addEventListener('click', (e) => {
         const colorBox = e.target.closest('.color-box');
         if (colorBox) {
             elements.colorPalette.querySelector('.active')?.classList.remove('active');
             colorBox.classList.add('active');
+            showMockup();
         }
     });
 
-    // Step 4: Set the initial state of the UI and generate the first mockup
+    // Step 4: Set the initial state of the UI and pre-render the whole palette
     updateActiveTemplate('mug');
-    generateMockup();
+    prerenderPalette();
 }
 
 // Start the entire process once the page is fully loaded.
@@ -9,12 +9,14 @@ document.getElementById('generator-form').addEventListener('submit', async funct
     const errorContainer = document.getElementById('error-container');
     const errorMessage = document.getElementById('error-message');
     const nextStepSection = document.getElementById('next-step-section');
+    const progressList = document.getElementById('progress-steps');
 
     // --- Reset UI ---
     loader.style.display = 'block';
     resultsContainer.style.display = 'none';
     errorContainer.style.display = 'none';
     nextStepSection.style.display = 'none';
+    progressList.innerHTML = '';
     
     try {
         const response = await fetch('/generate', {
@@ -23,14 +25,16 @@ document.getElementById('generator-form').addEventListener('submit', async funct
             body: JSON.stringify({ url: urlInput.value }),
         });
 
-        const data = await response.json();
+        const job = await response.json();
 
-        // This is the critical check. If the response is not OK (e.g., status 500),
-        // we use the error message from the JSON body sent by the server.
+        // A non-OK response means the job was never queued (bad input or a full queue).
         if (!response.ok) {
-            throw new Error(data.error || 'An unknown server error occurred.');
+            throw new Error(job.error || 'An unknown server error occurred.');
         }
 
+        // The analysis runs in the background; poll until it finishes.
+        const data = await pollJob(job.status_url);
+
         // Also validate the structure of the successful response.
         if (!data.base_analysis) {
             throw new Error('Analysis returned incomplete data. The website may be complex or block automated tools.');
@@ -45,10 +49,50 @@ document.getElementById('generator-form').addEventListener('submit', async funct
         errorMessage.textContent = error.message;
     } finally {
         loader.style.display = 'none';
+        progressList.style.display = 'none';
     }
 });
 
 
+const STEP_LABELS = {
+    fetch_html: 'Fetching HTML',
+    screenshot: 'Capturing screenshot',
+    logo: 'Finding logo',
+    colors: 'Extracting colors',
+    ai_analysis: 'Performing AI analysis'
+};
+
+/**
+ * Polls a job status URL, rendering step progress, until the job is done or failed.
+ * Resolves with the job result or rejects with the job's error message.
+ */
+async function pollJob(statusUrl, intervalMs = 1000) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || 'Lost track of the analysis job.');
+        }
+        renderProgress(job.steps);
+        if (job.status === 'done') return job.result;
+        if (job.status === 'failed') throw new Error(job.error || 'The analysis failed.');
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+function renderProgress(steps) {
+    const progressList = document.getElementById('progress-steps');
+    progressList.innerHTML = '';
+    steps.forEach(step => {
+        const li = document.createElement('li');
+        li.className = `progress-step ${step.status}`;
+        li.textContent = STEP_LABELS[step.name] || step.name;
+        progressList.appendChild(li);
+    });
+    progressList.style.display = 'block';
+}
+
+
 function populateAnalysisResults(data) {
     const timestamp = '?t=' + new Date().getTime();
     const resultsContainer = document.getElementById('results-container');
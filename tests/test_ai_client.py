@@ -0,0 +1,200 @@
+# tests/test_ai_client.py
+"""
+Tests AIClient against a local fake of the vision model, so no network or API key is needed.
+"""
+
+import json
+import time
+import threading
+import pytest
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from PIL import Image
+from src import ai_client
+from src.metrics import start_trace
+from src.ai_client import AIClient, TokenBucket, InvalidResponseError, _Request
+
+ANALYSIS = {"brand_aesthetics": "Clean and modern.", "design_recommendations": ["a", "b", "c"]}
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """
+    Answers `generate_content` from a script. Each entry is an answer (a dict or
+    list, sent as JSON), a raw string, or an exception to raise. The last entry
+    repeats once the script runs out.
+    """
+    def __init__(self, *script, gate=None):
+        self.script = list(script)
+        self.gate = gate
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_content(self, parts):
+        with self._lock:
+            self.calls.append(parts)
+            entry = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if self.gate:
+            self.gate.wait(5)
+        if isinstance(entry, Exception):
+            raise entry
+        return FakeResponse(entry if isinstance(entry, str) else json.dumps(entry))
+
+class FakeCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, kind, key):
+        return self.entries.get((kind, key))
+
+    def put(self, kind, key, value):
+        self.entries[(kind, key)] = value
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(ai_client, "BACKOFF_BASE_SECONDS", 0)
+
+def make_client(model, **options):
+    options = {"requests_per_minute": 0, "max_concurrency": 2, "batch_window_ms": 0, **options}
+    return AIClient(model, **options)
+
+def screenshot(tmp_path, name, reverse=False):
+    """Writes a horizontal gradient; the reversed one gets a different perceptual hash."""
+    img = Image.new('L', (64, 32))
+    img.putdata([(255 - x * 4 if reverse else x * 4) for _ in range(32) for x in range(64)])
+    path = tmp_path / name
+    img.convert('RGB').save(path)
+    return str(path)
+
+def test_call_retries_transient_errors():
+    model = FakeModel(ConnectionError("reset"), TimeoutError("slow"), ANALYSIS)
+    assert make_client(model)._call(["prompt"]) == ANALYSIS
+    assert len(model.calls) == 3
+
+def test_call_gives_up_after_max_retries():
+    model = FakeModel(ConnectionError("reset"))
+    with pytest.raises(ConnectionError):
+        make_client(model, max_retries=2)._call(["prompt"])
+    assert len(model.calls) == 3
+
+def test_call_retries_rate_limits_but_not_bad_requests():
+    google_exceptions = pytest.importorskip("google.api_core.exceptions")
+    model = FakeModel(google_exceptions.TooManyRequests("quota"), ANALYSIS)
+    assert make_client(model)._call(["prompt"]) == ANALYSIS
+    assert len(model.calls) == 2
+
+    model = FakeModel(google_exceptions.InvalidArgument("bad image"))
+    with pytest.raises(google_exceptions.InvalidArgument):
+        make_client(model)._call(["prompt"])
+    assert len(model.calls) == 1
+
+def test_call_retries_invalid_answers_only_when_asked():
+    model = FakeModel("not json", ANALYSIS)
+    assert make_client(model)._call(["prompt"]) == ANALYSIS
+    assert len(model.calls) == 2
+
+    model = FakeModel("not json", ANALYSIS)
+    with pytest.raises(InvalidResponseError):
+        make_client(model)._call(["prompt"], retry_invalid=False)
+    assert len(model.calls) == 1
+
+def run_batch(client, requests):
+    # _run_batch releases the dispatch slot it was started with.
+    client._slots.acquire()
+    client._run_batch(requests)
+    return [request.future for request in requests]
+
+def test_run_batch_splits_one_answer_per_screenshot():
+    first, second = dict(ANALYSIS, brand_aesthetics="First."), dict(ANALYSIS, brand_aesthetics="Second.")
+    model = FakeModel([first, second])
+    futures = run_batch(make_client(model), [_Request("a", "image-a"), _Request("b", "image-b")])
+    assert [future.result() for future in futures] == [first, second]
+    assert len(model.calls) == 1
+    assert model.calls[0][1:] == ["image-a", "image-b"]
+
+def test_run_batch_falls_back_to_single_calls_on_unusable_answer():
+    # The batch answer has one analysis instead of two; it is not retried, each screenshot is asked about alone.
+    model = FakeModel([ANALYSIS], ANALYSIS)
+    futures = run_batch(make_client(model), [_Request("a", "image-a"), _Request("b", "image-b")])
+    assert [future.result() for future in futures] == [ANALYSIS, ANALYSIS]
+    assert len(model.calls) == 3
+    assert [parts[1:] for parts in model.calls[1:]] == [["image-a"], ["image-b"]]
+
+def test_run_batch_fails_every_request_on_other_errors():
+    model = FakeModel(ValueError("rejected"))
+    futures = run_batch(make_client(model), [_Request("a", "image-a"), _Request("b", "image-b")])
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    assert len(model.calls) == 1
+
+def test_model_calls_are_recorded_in_the_submitters_trace(tmp_path):
+    client = make_client(FakeModel(ANALYSIS))
+    with start_trace() as spans:
+        client.analyze(screenshot(tmp_path, "a.png"), ["#111111"], timeout=5)
+    assert [span["stage"] for span in spans] == ["ai.generate_content"]
+    assert spans[0]["thread"].startswith("ai-client")
+
+def test_identical_requests_in_flight_share_one_call(tmp_path):
+    gate = threading.Event()
+    model = FakeModel(ANALYSIS, gate=gate)
+    client = make_client(model, batch_size=1)
+    first = client.submit(screenshot(tmp_path, "a.png"), ["#111111"])
+    # A re-encoded copy of the same screenshot has the same perceptual hash.
+    second = client.submit(screenshot(tmp_path, "b.jpg"), ["#111111"])
+    other = client.submit(screenshot(tmp_path, "c.png", reverse=True), ["#111111"])
+    assert second is first and other is not first
+    gate.set()
+    assert first.result(5) == ANALYSIS and other.result(5) == ANALYSIS
+    assert len(model.calls) == 2
+
+def test_answers_are_cached_by_screenshot_and_palette(tmp_path):
+    model = FakeModel(ANALYSIS)
+    client = make_client(model, cache=FakeCache())
+    path = screenshot(tmp_path, "a.png")
+    assert client.analyze(path, ["#111111"]) == ANALYSIS
+    assert client.analyze(path, ["#111111"]) == ANALYSIS
+    assert len(model.calls) == 1
+    client.analyze(path, ["#222222"])
+    client.analyze(path, ["#111111"], force_refresh=True)
+    assert len(model.calls) == 3
+
+def test_analyze_gives_up_after_timeout_but_caches_the_late_answer(tmp_path):
+    gate = threading.Event()
+    model = FakeModel(ANALYSIS, gate=gate)
+    cache = FakeCache()
+    client = make_client(model, cache=cache)
+    path = screenshot(tmp_path, "a.png")
+    with pytest.raises(FutureTimeoutError):
+        client.analyze(path, ["#111111"], timeout=0.05)
+    gate.set()
+    assert client.analyze(path, ["#111111"], timeout=5) == ANALYSIS
+    assert len(model.calls) == 1
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - start < 0.03
+    bucket.acquire()
+    bucket.acquire()
+    # Two more tokens at 20 per second take about 0.1 s to refill.
+    assert 0.08 <= time.monotonic() - start < 0.5
+
+def test_token_bucket_with_zero_rate_never_blocks():
+    bucket = TokenBucket(rate=0, capacity=1)
+    start = time.monotonic()
+    for _ in range(100):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+def test_calls_are_paced_by_the_request_budget():
+    model = FakeModel(ANALYSIS)
+    client = make_client(model, requests_per_minute=600, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        client._call(["prompt"])
+    # One call is covered by the burst; the next two wait 0.1 s each at 10 requests per second.
+    assert time.monotonic() - start >= 0.18